@@ -0,0 +1,294 @@
+# agendador.py
+import os
+import csv
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import arquivo_compartilhado
+
+try:
+    import config
+except ImportError:
+    print("ERRO CRÍTICO em agendador.py: O arquivo config.py não foi encontrado ou não pôde ser importado.")
+
+
+    class FallbackConfig:
+        CRITERIOS_AGENDAMENTO = ("prazo", "prioridade", "custo", "chegada")
+        INTERVALO_ENVELHECIMENTO_SEGUNDOS = 900
+        JANELA_PRAZO_SEGUNDOS = 4 * 3600
+        PRIORIDADE_URGENTE = 10
+        ARQUIVO_HISTORICO_ESTAGIOS = "historico_estagios.json"
+        ARQUIVO_TEMPOS_FILA = "tempos_fila.csv"
+        PASTA_PROCESSOS_PDF = "."
+
+
+    config = FallbackConfig()
+
+# Marcadores ao lado do PDF na pasta de entrada (mesmo nome-base do PDF):
+#   <processo>.urgente      arquivo vazio: prioridade config.PRIORIDADE_URGENTE
+#   <processo>.agenda.json  {"prioridade": 5, "prazo": "2026-10-20T17:00"} (ambos opcionais)
+SUFIXO_MARCADOR_URGENTE = ".urgente"
+SUFIXO_MARCADOR_AGENDA = ".agenda.json"
+
+# Qual tamanho dirige o custo de cada estágio, e o custo por MB assumido antes de haver histórico
+ESTAGIOS_CUSTO = {
+    "extracao": ("tamanho", 1.0),
+    "unificacao": ("tamanho_comprovantes", 0.5),
+    "envio": ("tamanho_comprovantes", 0.5),
+}
+# Peso das novas amostras na média móvel exponencial do custo por MB
+PESO_AMOSTRA_HISTORICO = 0.2
+# Tamanho mínimo considerado (arquivos minúsculos ainda têm custo fixo)
+TAMANHO_MINIMO_MB = 0.05
+
+CABECALHO_TEMPOS_FILA = ["registrado_em", "pdf", "chegada", "inicio", "espera_segundos", "prioridade", "prazo",
+                         "custo_estimado_segundos", "duracao_segundos", "sucesso"]
+
+
+class TarefaPDF(NamedTuple):
+    nome: str
+    caminho: str
+    chegada: float  # mtime do PDF na pasta de entrada
+    tamanho: int
+    tamanho_comprovantes: int
+    prioridade: int  # maior = mais urgente
+    prazo: Optional[float]  # timestamp; None se não houver
+    custo_estimado: float  # segundos
+
+
+def _aplicar_amostra(segundos_por_mb: Dict[str, float], amostras: Dict[str, int], estagio: str, amostra: float):
+    anterior = segundos_por_mb.get(estagio)
+    segundos_por_mb[estagio] = amostra if anterior is None else \
+        (1 - PESO_AMOSTRA_HISTORICO) * anterior + PESO_AMOSTRA_HISTORICO * amostra
+    amostras[estagio] = amostras.get(estagio, 0) + 1
+
+
+class HistoricoEstagios:
+    """
+    Custo médio por MB de cada estágio (extração, unificação, envio), aprendido das execuções anteriores.
+
+    As amostras medidas nesta execução ficam guardadas até salvar(), que as reaplica sobre o
+    arquivo relido sob lock: workers que gravam o mesmo histórico não apagam as amostras uns dos outros.
+    """
+
+    def __init__(self, caminho_arquivo: Optional[str] = None):
+        self.caminho_arquivo = caminho_arquivo or config.ARQUIVO_HISTORICO_ESTAGIOS
+        self._segundos_por_mb: Dict[str, float] = {}
+        self._amostras: Dict[str, int] = {}
+        self._pendentes: List[Tuple[str, float]] = []  # (estágio, segundos por MB) ainda não gravados
+
+    def carregar(self):
+        if not os.path.exists(self.caminho_arquivo):
+            return
+        try:
+            self._segundos_por_mb, self._amostras = self._ler_historico()
+        except Exception as e:
+            print(f"  [Agendador] Erro ao ler o histórico de estágios ({self.caminho_arquivo}): {e}")
+
+    def _ler_historico(self) -> Tuple[Dict[str, float], Dict[str, int]]:
+        dados = arquivo_compartilhado.ler_json(self.caminho_arquivo, {})
+        return ({estagio: float(valores["segundos_por_mb"]) for estagio, valores in dados.items()},
+                {estagio: int(valores.get("amostras", 0)) for estagio, valores in dados.items()})
+
+    def salvar(self):
+        """Relê o arquivo sob lock, reaplica as amostras desta execução sobre ele e grava."""
+        if not self._pendentes:
+            return
+        try:
+            with arquivo_compartilhado.travar_arquivo(self.caminho_arquivo):
+                segundos_por_mb, amostras = self._ler_historico()
+                for estagio, amostra in self._pendentes:
+                    _aplicar_amostra(segundos_por_mb, amostras, estagio, amostra)
+                dados = {estagio: {"segundos_por_mb": round(valor, 6), "amostras": amostras.get(estagio, 0)}
+                         for estagio, valor in sorted(segundos_por_mb.items())}
+                arquivo_compartilhado.gravar_json_atomico(self.caminho_arquivo, dados, indent=2)
+            self._segundos_por_mb, self._amostras = segundos_por_mb, amostras
+            self._pendentes = []
+        except Exception as e:
+            print(f"  [Agendador] Erro ao gravar o histórico de estágios ({self.caminho_arquivo}): {e}")
+
+    def estimar(self, tamanhos: Dict[str, int]) -> float:
+        """Tempo esperado (s) do PDF somando os estágios, a partir dos tamanhos em bytes."""
+        total = 0.0
+        for estagio, (campo_tamanho, padrao) in ESTAGIOS_CUSTO.items():
+            mb = max(tamanhos.get(campo_tamanho, 0) / (1024 * 1024), TAMANHO_MINIMO_MB)
+            total += self._segundos_por_mb.get(estagio, padrao) * mb
+        return total
+
+    def registrar(self, tempos: Dict[str, float], tamanhos: Dict[str, int]):
+        """Atualiza a média móvel com os tempos medidos de um PDF (estágios não executados são ignorados)."""
+        for estagio, duracao in tempos.items():
+            if estagio not in ESTAGIOS_CUSTO:
+                continue
+            campo_tamanho, padrao = ESTAGIOS_CUSTO[estagio]
+            mb = max(tamanhos.get(campo_tamanho, 0) / (1024 * 1024), TAMANHO_MINIMO_MB)
+            amostra = duracao / mb
+            _aplicar_amostra(self._segundos_por_mb, self._amostras, estagio, amostra)
+            self._pendentes.append((estagio, amostra))
+
+
+def marcadores_na_listagem(nomes_arquivos: Iterable[str]) -> Dict[str, Set[str]]:
+    """Nome-base -> sufixos de marcador presentes, a partir de uma listagem já feita da pasta de entrada."""
+    marcadores: Dict[str, Set[str]] = {}
+    for nome in nomes_arquivos:
+        for sufixo in (SUFIXO_MARCADOR_AGENDA, SUFIXO_MARCADOR_URGENTE):
+            if nome.endswith(sufixo) and len(nome) > len(sufixo):
+                marcadores.setdefault(nome[:-len(sufixo)], set()).add(sufixo)
+                break
+    return marcadores
+
+
+def _ler_prazo(valor) -> Optional[float]:
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    return datetime.fromisoformat(str(valor)).timestamp()
+
+
+class Agendador:
+    """
+    Fila de PDFs ordenada por critérios configuráveis (config.CRITERIOS_AGENDAMENTO), aplicados em ordem:
+
+    - "prazo":      PDFs com prazo vencido ou dentro de config.JANELA_PRAZO_SEGUNDOS vêm antes,
+                    o prazo mais próximo primeiro
+    - "prioridade": prioridade explícita (marcadores) + envelhecimento: cada
+                    config.INTERVALO_ENVELHECIMENTO_SEGUNDOS de espera soma 1, então nenhum PDF
+                    fica para trás indefinidamente
+    - "custo":      menor tempo esperado primeiro (tamanho do PDF e dos comprovantes x histórico)
+    - "chegada":    mais antigo primeiro
+
+    A ordem é recalculada a cada proximo(), para o envelhecimento valer durante a própria execução.
+    O tempo de espera na fila de cada PDF é gravado em config.ARQUIVO_TEMPOS_FILA (CSV).
+    """
+
+    def __init__(self, pasta_fila: Optional[str] = None, indice=None, historico: Optional[HistoricoEstagios] = None,
+                 criterios: Optional[Iterable[str]] = None):
+        self.pasta_fila = pasta_fila or config.PASTA_PROCESSOS_PDF
+        self.indice = indice
+        self.historico = historico or HistoricoEstagios()
+        self.criterios = tuple(criterios or config.CRITERIOS_AGENDAMENTO)
+        criterios_invalidos = set(self.criterios) - {"prazo", "prioridade", "custo", "chegada"}
+        if criterios_invalidos:
+            raise ValueError(f"Critério(s) de agendamento inválido(s): {', '.join(sorted(criterios_invalidos))}")
+        self._pendentes: List[TarefaPDF] = []
+
+    def __len__(self) -> int:
+        return len(self._pendentes)
+
+    def adicionar(self, nomes_pdf: Iterable[str], marcadores: Optional[Dict[str, Set[str]]] = None) -> int:
+        """
+        Enfileira os PDFs (nomes dentro de pasta_fila). Retorna quantos foram adicionados.
+        'marcadores' é o resultado de marcadores_na_listagem sobre uma listagem da pasta já feita
+        pelo chamador; sem ele, a pasta é listada uma vez aqui.
+        """
+        if marcadores is None:
+            try:
+                marcadores = marcadores_na_listagem(os.listdir(self.pasta_fila))
+            except OSError as e:
+                print(f"  [Agendador] Não foi possível listar os marcadores em {self.pasta_fila}: {e}")
+                marcadores = {}
+        adicionados = 0
+        for nome_pdf in nomes_pdf:
+            tarefa = self._criar_tarefa(nome_pdf, marcadores)
+            if tarefa:
+                self._pendentes.append(tarefa)
+                adicionados += 1
+        return adicionados
+
+    def _criar_tarefa(self, nome_pdf: str, marcadores: Dict[str, Set[str]]) -> Optional[TarefaPDF]:
+        caminho = os.path.join(self.pasta_fila, nome_pdf)
+        try:
+            info = os.stat(caminho)
+        except OSError as e:
+            print(f"  [Agendador] Não foi possível ler {nome_pdf}: {e}")
+            return None
+        base, _ = os.path.splitext(nome_pdf)
+        prioridade, prazo = self._ler_marcadores(base, marcadores.get(base, set()))
+        tamanho_comprovantes = 0
+        if self.indice is not None:
+            tamanho_comprovantes = sum(arquivo.tamanho for arquivo in (self.indice.obter(base) or []))
+        tamanhos = {"tamanho": info.st_size, "tamanho_comprovantes": tamanho_comprovantes}
+        return TarefaPDF(nome_pdf, caminho, info.st_mtime, info.st_size, tamanho_comprovantes,
+                         prioridade, prazo, self.historico.estimar(tamanhos))
+
+    def _ler_marcadores(self, base: str, sufixos: Set[str]):
+        prioridade, prazo = 0, None
+        if SUFIXO_MARCADOR_URGENTE in sufixos:
+            prioridade = config.PRIORIDADE_URGENTE
+        if SUFIXO_MARCADOR_AGENDA in sufixos:
+            caminho_agenda = os.path.join(self.pasta_fila, base + SUFIXO_MARCADOR_AGENDA)
+            try:
+                with open(caminho_agenda, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                prioridade = max(prioridade, int(dados.get("prioridade", 0)))
+                prazo = _ler_prazo(dados.get("prazo"))
+            except Exception as e:
+                print(f"  [Agendador] Marcador de agenda inválido para {base} ({caminho_agenda}): {e}")
+        return prioridade, prazo
+
+    def _chave(self, tarefa: TarefaPDF, agora: float):
+        chave = []
+        for criterio in self.criterios:
+            if criterio == "prazo":
+                proximo = tarefa.prazo is not None and tarefa.prazo - agora <= config.JANELA_PRAZO_SEGUNDOS
+                chave.append((0, tarefa.prazo) if proximo else (1, 0))
+            elif criterio == "prioridade":
+                envelhecimento = int(max(0.0, agora - tarefa.chegada) // config.INTERVALO_ENVELHECIMENTO_SEGUNDOS)
+                chave.append(-(tarefa.prioridade + envelhecimento))
+            elif criterio == "custo":
+                chave.append(tarefa.custo_estimado)
+            else:
+                chave.append(tarefa.chegada)
+        chave.append(tarefa.nome)  # desempate estável
+        return tuple(chave)
+
+    def ordem_atual(self) -> List[TarefaPDF]:
+        agora = time.time()
+        return sorted(self._pendentes, key=lambda tarefa: self._chave(tarefa, agora))
+
+    def proximo(self) -> Optional[TarefaPDF]:
+        """Retira e devolve o próximo PDF a processar (None se a fila acabou)."""
+        if not self._pendentes:
+            return None
+        agora = time.time()
+        tarefa = min(self._pendentes, key=lambda t: self._chave(t, agora))
+        self._pendentes.remove(tarefa)
+        return tarefa
+
+    def registrar(self, tarefa: TarefaPDF, inicio: float, tempos: Dict[str, float], sucesso: bool):
+        """Grava espera na fila e duração do PDF e alimenta o histórico de custos com os tempos dos estágios."""
+        espera = max(0.0, inicio - tarefa.chegada)
+        duracao = time.time() - inicio
+        self.historico.registrar(tempos, {"tamanho": tarefa.tamanho,
+                                          "tamanho_comprovantes": tarefa.tamanho_comprovantes})
+        print(f"  [Agendador] {tarefa.nome}: espera na fila {espera:.0f}s, processamento {duracao:.1f}s "
+              f"(estimado {tarefa.custo_estimado:.1f}s).")
+        linha = [time.strftime('%Y-%m-%d %H:%M:%S'), tarefa.nome,
+                 datetime.fromtimestamp(tarefa.chegada).isoformat(timespec="seconds"),
+                 datetime.fromtimestamp(inicio).isoformat(timespec="seconds"), f"{espera:.1f}", tarefa.prioridade,
+                 datetime.fromtimestamp(tarefa.prazo).isoformat(timespec="seconds") if tarefa.prazo else "",
+                 f"{tarefa.custo_estimado:.2f}", f"{duracao:.2f}", int(bool(sucesso))]
+        try:
+            novo_arquivo = not os.path.exists(config.ARQUIVO_TEMPOS_FILA)
+            with open(config.ARQUIVO_TEMPOS_FILA, "a", encoding="utf-8", newline="") as f:
+                escritor = csv.writer(f, delimiter=";")
+                if novo_arquivo:
+                    escritor.writerow(CABECALHO_TEMPOS_FILA)
+                escritor.writerow(linha)
+        except Exception as e:
+            print(f"  [Agendador] Erro ao gravar tempos de fila ({config.ARQUIVO_TEMPOS_FILA}): {e}")
+
+    def descartar_marcadores(self, tarefa: TarefaPDF):
+        """Remove os marcadores de prioridade/prazo do PDF já processado."""
+        base, _ = os.path.splitext(tarefa.nome)
+        for sufixo in (SUFIXO_MARCADOR_URGENTE, SUFIXO_MARCADOR_AGENDA):
+            caminho = os.path.join(self.pasta_fila, base + sufixo)
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"  [Agendador] Não foi possível remover o marcador {caminho}: {e}")
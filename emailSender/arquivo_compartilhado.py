@@ -0,0 +1,80 @@
+# arquivo_compartilhado.py
+import os
+import json
+import time
+import socket
+from contextlib import contextmanager
+
+# Quanto tempo esperar pelo lock de outro worker antes de desistir
+TEMPO_ESPERA_LOCK_SEGUNDOS = 30
+# Lock mais velho que isto é de um worker que caiu segurando-o: pode ser removido
+TEMPO_LOCK_ABANDONADO_SEGUNDOS = 120
+INTERVALO_TENTATIVA_SEGUNDOS = 0.1
+
+
+class LockIndisponivel(Exception):
+    """Outro worker está segurando o lock do arquivo há mais tempo que o tolerado."""
+
+
+def _sufixo_worker() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@contextmanager
+def travar_arquivo(caminho: str, tempo_espera: float = TEMPO_ESPERA_LOCK_SEGUNDOS):
+    """
+    Lock entre processos/máquinas para ler-mesclar-gravar um arquivo compartilhado:
+    cria '<caminho>.lock' com O_EXCL (atômico também em compartilhamentos SMB).
+    """
+    caminho_lock = caminho + ".lock"
+    limite = time.monotonic() + tempo_espera
+    while True:
+        try:
+            descritor = os.open(caminho_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(caminho_lock).st_mtime > TEMPO_LOCK_ABANDONADO_SEGUNDOS:
+                    os.remove(caminho_lock)
+                    continue
+            except OSError:
+                continue  # o lock acabou de ser liberado
+            if time.monotonic() > limite:
+                raise LockIndisponivel(f"Lock '{caminho_lock}' ocupado há mais de {tempo_espera:g}s.")
+            time.sleep(INTERVALO_TENTATIVA_SEGUNDOS)
+    try:
+        os.write(descritor, _sufixo_worker().encode("utf-8"))
+        os.close(descritor)
+        yield
+    finally:
+        try:
+            os.remove(caminho_lock)
+        except OSError:
+            pass
+
+
+def ler_json(caminho: str, padrao=None):
+    """Conteúdo JSON do arquivo, ou 'padrao' se ele ainda não existe."""
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def gravar_json_atomico(caminho: str, dados, **opcoes_json):
+    """
+    Grava via arquivo temporário exclusivo deste worker + os.replace. No Windows o replace falha
+    se outro processo está com o destino aberto para leitura; nesse caso tenta de novo por alguns instantes.
+    """
+    caminho_temporario = f"{caminho}.{_sufixo_worker()}.tmp"
+    with open(caminho_temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, **opcoes_json)
+    for tentativa in range(20):
+        try:
+            os.replace(caminho_temporario, caminho)
+            return
+        except PermissionError:
+            if tentativa == 19:
+                os.remove(caminho_temporario)
+                raise
+            time.sleep(INTERVALO_TENTATIVA_SEGUNDOS)
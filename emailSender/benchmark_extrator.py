@@ -0,0 +1,107 @@
+# benchmark_extrator.py
+"""
+Micro-benchmark e verificação de precisão do extrator de Vara/Comarca.
+
+Uso: python benchmark_extrator.py [--repeticoes N]
+
+- Precisão: compara a saída de extrator_campos com o corpus "golden" em corpus_extrator/
+  (um .txt por caso e os valores esperados em esperado.json). Qualquer divergência faz o
+  script terminar com código 1.
+- Velocidade: mede a implementação anterior (dois re.search com padrões em string +
+  limpezas com replace/re.sub) contra o extrator pré-compilado, no corpus e num texto
+  longo sintético com o cabeçalho no fim.
+
+Rode sempre que alterar os padrões de extrator_campos.py.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import extrator_campos
+
+PASTA_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus_extrator")
+
+
+def extrair_implementacao_anterior(texto_pdf: str) -> dict:
+    """Reprodução da extração anterior (sem prints), usada como referência de tempo."""
+    dados_pdf = {}
+    match_vara = re.search(r"(\d+ª\s*vara\s*c[íi]vel)", texto_pdf, re.IGNORECASE)
+    if match_vara:
+        vara_limpa = match_vara.group(1).strip().replace("\n", " ").replace("\r", " ")
+        dados_pdf["vara_civel"] = re.sub(r'\s+', ' ', vara_limpa).strip()
+    match_comarca = re.search(r"Comarca\s+de\s+([A-Za-zÀ-ú\s-]+(?:SP)?)", texto_pdf, re.IGNORECASE)
+    if match_comarca:
+        comarca_limpa = match_comarca.group(1).strip().replace("\n", " ").replace("\r", " ")
+        dados_pdf["comarca"] = re.sub(r'\s+', ' ', comarca_limpa).strip()
+    return dados_pdf
+
+
+def carregar_corpus():
+    with open(os.path.join(PASTA_CORPUS, "esperado.json"), "r", encoding="utf-8") as f:
+        esperado = json.load(f)
+    textos = {}
+    for nome_arquivo in sorted(esperado):
+        with open(os.path.join(PASTA_CORPUS, nome_arquivo), "r", encoding="utf-8") as f:
+            textos[nome_arquivo] = f.read()
+    return textos, esperado
+
+
+def verificar_precisao(textos: dict, esperado: dict) -> int:
+    divergencias = 0
+    resultados = extrator_campos.extrair_campos_lote(textos.values())
+    for nome_arquivo, resultado in zip(textos, resultados):
+        obtido = resultado.como_dict()
+        anterior = extrair_implementacao_anterior(textos[nome_arquivo])
+        ok = obtido == esperado[nome_arquivo]
+        if not ok:
+            divergencias += 1
+        print(f"  [{'OK' if ok else 'ERRO'}] {nome_arquivo}")
+        if not ok:
+            print(f"        esperado: {esperado[nome_arquivo]}")
+            print(f"        obtido:   {obtido}")
+        if anterior != obtido:
+            print(f"        (implementação anterior: {anterior})")
+    return divergencias
+
+
+def medir(funcao, textos, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in textos:
+            funcao(texto)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    textos, esperado = carregar_corpus()
+    print(f"--- Precisão no corpus ({len(textos)} caso(s)) ---")
+    divergencias = verificar_precisao(textos, esperado)
+
+    # Documento longo: ~200 páginas de texto corrido, cabeçalho só no fim (pior caso para a busca)
+    texto_longo = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40 + "\n") * 200 + \
+        textos["01_cabecalho_padrao.txt"]
+
+    print(f"\n--- Velocidade ({args.repeticoes} repetições) ---")
+    cenarios = [("corpus", list(textos.values()), args.repeticoes),
+                ("texto longo", [texto_longo], max(1, args.repeticoes // 100))]
+    for nome, lote, repeticoes in cenarios:
+        t_anterior = medir(extrair_implementacao_anterior, lote, repeticoes)
+        t_novo = medir(extrator_campos.extrair_campos, lote, repeticoes)
+        print(f"  {nome:<12} anterior: {t_anterior:.4f}s  pré-compilado: {t_novo:.4f}s  "
+              f"(x{t_anterior / t_novo if t_novo else float('inf'):.2f})")
+
+    if divergencias:
+        print(f"\n{divergencias} divergência(s) em relação ao corpus esperado.")
+        sys.exit(1)
+    print("\nCorpus conferido sem divergências.")
+
+
+if __name__ == "__main__":
+    main()
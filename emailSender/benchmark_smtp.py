@@ -0,0 +1,280 @@
+# benchmark_smtp.py
+"""
+Benchmark do envio SMTP contra um servidor local simulado, com latência de rede injetada.
+
+Uso: python benchmark_smtp.py [--latencia-ms 80] [--pdfs 4] [--mensagens 2] [--tamanho-kb 20] [--rodadas-tls 3]
+
+O servidor simulado responde EHLO, AUTH, MAIL, RCPT, DATA, BDAT, RSET, NOOP e QUIT. A cada
+"rodada" (tudo o que o cliente escreveu antes de parar para esperar) ele processa os comandos
+recebidos e devolve as respostas juntas depois de --latencia-ms, imitando o tempo de ida e
+volta até o relay. Assim o custo de cada espera do cliente fica visível.
+
+O tempo medido inclui o estabelecimento de cada sessão, como em produção: saudação, EHLO,
+STARTTLS + handshake TLS, novo EHLO e AUTH. O TLS não é cifrado de verdade: suas idas e voltas
+(--rodadas-tls; 3 = STARTTLS + handshake completo do TLS 1.2, 2 para TLS 1.3) são simuladas com NOOPs.
+
+Cenários medidos, todos enviando --pdfs lotes de --mensagens mensagens (um lote por PDF):
+- passo a passo:           uma sessão por PDF, servidor sem PIPELINING (sendmail: MAIL, espera, RCPT, espera, ...)
+- PIPELINING:              uma sessão por PDF, SMTPPipelining.enviar_lote só com PIPELINING
+- CHUNKING:                uma sessão por PDF, SMTPPipelining.enviar_lote com PIPELINING + CHUNKING (BDAT)
+- CHUNKING, sessão única:  como email_sender.SessaoSMTP: uma sessão para a execução, RSET antes de cada PDF
+
+Depois, em cada modo de envio, confere o resultado por mensagem quando o servidor recusa um
+destinatário do lote e o conteúdo de uma das mensagens (as demais precisam seguir normalmente).
+
+O script termina com código 1 se alguma mensagem não chegar íntegra ao servidor ou se algum
+resultado por mensagem divergir do esperado.
+"""
+import sys
+import time
+import socket
+import argparse
+import threading
+
+from smtp_pipelining import SMTPPipelining
+
+
+DESTINATARIO = "vara@exemplo.com"
+DESTINATARIO_RECUSADO = "desconhecido@exemplo.com"
+# Cabeçalho que faz o servidor simulado recusar a mensagem depois de receber o conteúdo
+MARCA_CONTEUDO_RECUSADO = b"X-Teste-Recusa: sim"
+
+EXTENSOES_BASE = ["SIZE 10485760", "AUTH PLAIN"]
+MODOS_ENVIO = [
+    ("passo a passo", EXTENSOES_BASE),
+    ("PIPELINING", EXTENSOES_BASE + ["PIPELINING"]),
+    ("CHUNKING", EXTENSOES_BASE + ["PIPELINING", "CHUNKING"]),
+]
+
+
+class ServidorSMTPSimulado:
+    """Servidor SMTP mínimo (uma sessão por vez) que atrasa cada lote de respostas."""
+
+    def __init__(self, latencia: float, extensoes, recusar=(), recusar_conteudo: bytes = MARCA_CONTEUDO_RECUSADO):
+        self.latencia = latencia
+        self.extensoes = list(extensoes)
+        self.recusar = set(recusar)  # destinatários respondidos com 550
+        self.recusar_conteudo = recusar_conteudo  # mensagens com este trecho são respondidas com 554 após os dados
+        self.mensagens_recebidas = []
+        self.rodadas = 0
+        self._socket = socket.create_server(("127.0.0.1", 0))
+        self.porta = self._socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._aceitar, daemon=True)
+        self._thread.start()
+
+    def encerrar(self):
+        self._socket.close()
+
+    def _aceitar(self):
+        try:
+            while True:
+                conexao, _ = self._socket.accept()
+                with conexao:
+                    self._atender(conexao)
+        except OSError:
+            pass
+
+    def _atender(self, conexao):
+        conexao.sendall(b"220 simulado ESMTP\r\n")
+        buffer = b""
+        estado = {"dados": None, "bdat": None, "mensagem": b"", "aceitos": 0}
+        while True:
+            recebido = conexao.recv(65536)
+            if not recebido:
+                return
+            buffer += recebido
+            respostas, buffer, encerrar = self._processar(buffer, estado)
+            if respostas:
+                self.rodadas += 1
+                time.sleep(self.latencia)
+                conexao.sendall(b"".join(respostas))
+            if encerrar:
+                return
+
+    def _processar(self, buffer, estado):
+        respostas = []
+        while True:
+            if estado["bdat"] is not None:
+                # Lendo os bytes de um BDAT: consome exatamente o tamanho anunciado
+                falta = estado["bdat"]
+                if len(buffer) < falta:
+                    return respostas, buffer, False
+                estado["mensagem"] += buffer[:falta]
+                buffer = buffer[falta:]
+                estado["bdat"] = None
+                if not estado["aceitos"]:
+                    estado["mensagem"] = b""
+                    respostas.append(b"554 5.5.1 Nenhum destinatario valido\r\n")
+                    continue
+                conteudo, estado["mensagem"], estado["aceitos"] = estado["mensagem"], b"", 0
+                respostas.append(self._receber(conteudo, b"250 2.0.0 Mensagem aceita (BDAT)\r\n"))
+                continue
+            if estado["dados"] is not None:
+                fim = buffer.find(b"\r\n.\r\n")
+                if fim < 0:
+                    return respostas, buffer, False
+                conteudo = buffer[:fim + 2].replace(b"\r\n..", b"\r\n.")
+                if conteudo.startswith(b".."):
+                    conteudo = conteudo[1:]
+                buffer = buffer[fim + 5:]
+                estado["dados"], estado["aceitos"] = None, 0
+                respostas.append(self._receber(conteudo, b"250 2.0.0 Mensagem aceita\r\n"))
+                continue
+            fim_linha = buffer.find(b"\r\n")
+            if fim_linha < 0:
+                return respostas, buffer, False
+            linha = buffer[:fim_linha].decode("ascii", "replace")
+            buffer = buffer[fim_linha + 2:]
+            verbo = linha.split(" ", 1)[0].upper()
+            if verbo in ("EHLO", "HELO"):
+                linhas = ["simulado"] + self.extensoes
+                respostas.append("".join(f"250{'-' if i < len(linhas) - 1 else ' '}{texto}\r\n"
+                                         for i, texto in enumerate(linhas)).encode("ascii"))
+            elif verbo == "AUTH":
+                respostas.append(b"235 2.7.0 Autenticado\r\n")
+            elif verbo == "RCPT" and linha[linha.find("<") + 1:linha.find(">")] in self.recusar:
+                respostas.append(b"550 5.1.1 Destinatario desconhecido\r\n")
+            elif verbo == "RCPT":
+                estado["aceitos"] += 1
+                respostas.append(b"250 2.1.5 OK\r\n")
+            elif verbo == "RSET":
+                estado["aceitos"] = 0
+                respostas.append(b"250 2.0.0 OK\r\n")
+            elif verbo in ("MAIL", "NOOP"):
+                respostas.append(b"250 2.1.0 OK\r\n")
+            elif verbo == "DATA" and not estado["aceitos"]:
+                respostas.append(b"554 5.5.1 Nenhum destinatario valido\r\n")
+            elif verbo == "DATA":
+                estado["dados"] = True
+                respostas.append(b"354 Envie os dados\r\n")
+            elif verbo == "BDAT":
+                estado["bdat"] = int(linha.split()[1])
+            elif verbo == "QUIT":
+                respostas.append(b"221 Tchau\r\n")
+                return respostas, buffer, True
+            else:
+                respostas.append(b"502 Comando desconhecido\r\n")
+
+    def _receber(self, conteudo: bytes, resposta_aceita: bytes) -> bytes:
+        if self.recusar_conteudo and self.recusar_conteudo in conteudo:
+            return b"554 5.7.1 Conteudo recusado\r\n"
+        self.mensagens_recebidas.append(conteudo)
+        return resposta_aceita
+
+
+def gerar_mensagens(quantidade: int, tamanho_kb: int, prefixo: str = "", recusadas=()):
+    """Mensagens de teste; as de índice em 'recusadas' levam o cabeçalho que o servidor simulado recusa."""
+    mensagens = []
+    for i in range(quantidade):
+        corpo = "\r\n".join(f"linha {j} da mensagem {prefixo}{i} " + "x" * 60 for j in range(tamanho_kb * 1024 // 80))
+        marca = MARCA_CONTEUDO_RECUSADO.decode("ascii") + "\r\n" if i in recusadas else ""
+        mensagens.append((f"From: remetente@exemplo.com\r\nTo: {DESTINATARIO}\r\nSubject: Teste {prefixo}{i}\r\n"
+                          f"{marca}\r\n.linha iniciada por ponto\r\n{corpo}\r\n").encode("ascii"))
+    return mensagens
+
+
+def abrir_sessao(servidor: ServidorSMTPSimulado, rodadas_tls: int) -> SMTPPipelining:
+    """Conexão + EHLO + STARTTLS/handshake TLS (simulados) + EHLO + AUTH, como email_sender.SessaoSMTP."""
+    cliente = SMTPPipelining("127.0.0.1", servidor.porta)
+    cliente.ehlo()
+    for _ in range(rodadas_tls):
+        cliente.noop()
+    cliente.ehlo()
+    cliente.login("remetente@exemplo.com", "senha")
+    return cliente
+
+
+def medir_cenario(nome, extensoes, lotes, latencia, rodadas_tls: int, sessao_unica: bool):
+    servidor = ServidorSMTPSimulado(latencia, extensoes)
+    ok = True
+    try:
+        inicio = time.perf_counter()
+        cliente = None
+        for mensagens in lotes:
+            if cliente is None:
+                cliente = abrir_sessao(servidor, rodadas_tls)
+            else:
+                cliente.rset()  # conferência da sessão reaproveitada, como em SessaoSMTP.obter
+            resultados = cliente.enviar_lote("remetente@exemplo.com", [DESTINATARIO], mensagens)
+            ok = ok and all(resultado.sucesso for resultado in resultados)
+            if not sessao_unica:
+                cliente.quit()
+                cliente = None
+        if cliente is not None:
+            cliente.quit()
+        duracao = time.perf_counter() - inicio
+    finally:
+        servidor.encerrar()
+    integras = ok and servidor.mensagens_recebidas == [mensagem for mensagens in lotes for mensagem in mensagens]
+    print(f"  {nome:<24} {duracao:7.3f}s  rodadas: {servidor.rodadas:3d}  "
+          f"mensagens íntegras: {'sim' if integras else 'NÃO'}")
+    return duracao, integras
+
+
+def conferir_recusas(nome, extensoes) -> bool:
+    """
+    Lote de 3 mensagens para [DESTINATARIO, DESTINATARIO_RECUSADO], com a do meio recusada pelo conteúdo;
+    depois um lote só para o destinatário recusado. Confere o ResultadoEnvio de cada mensagem.
+    """
+    mensagens = gerar_mensagens(3, 2, prefixo="r", recusadas={1})
+    sozinha = gerar_mensagens(1, 2, prefixo="s")
+    servidor = ServidorSMTPSimulado(0, extensoes, recusar={DESTINATARIO_RECUSADO})
+    try:
+        cliente = abrir_sessao(servidor, 0)
+        resultados = cliente.enviar_lote("remetente@exemplo.com", [DESTINATARIO, DESTINATARIO_RECUSADO], mensagens)
+        resultados_recusados = cliente.enviar_lote("remetente@exemplo.com", [DESTINATARIO_RECUSADO], sozinha)
+        cliente.quit()
+    finally:
+        servidor.encerrar()
+
+    divergencias = []
+    if [resultado.sucesso for resultado in resultados] != [True, False, True]:
+        divergencias.append(f"sucesso por mensagem {[resultado.sucesso for resultado in resultados]}, esperado [True, False, True]")
+    for i in (0, 2):
+        if set(resultados[i].recusados) != {DESTINATARIO_RECUSADO}:
+            divergencias.append(f"mensagem {i + 1}: recusados {resultados[i].recusados!r}")
+    if [resultado.sucesso for resultado in resultados_recusados] != [False] or \
+            set(resultados_recusados[0].recusados) != {DESTINATARIO_RECUSADO}:
+        divergencias.append(f"lote sem destinatário válido: {resultados_recusados!r}")
+    if servidor.mensagens_recebidas != [mensagens[0], mensagens[2]]:
+        divergencias.append(f"{len(servidor.mensagens_recebidas)} mensagem(ns) entregue(s), esperadas a 1ª e a 3ª")
+
+    print(f"  {nome:<14} {'OK' if not divergencias else 'FALHA: ' + '; '.join(divergencias)}")
+    return not divergencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia-ms", type=float, default=80)
+    parser.add_argument("--pdfs", type=int, default=4, help="Lotes enviados (um por PDF).")
+    parser.add_argument("--mensagens", type=int, default=2, help="Mensagens por PDF (partes de um envio dividido).")
+    parser.add_argument("--tamanho-kb", type=int, default=20)
+    parser.add_argument("--rodadas-tls", type=int, default=3, help="Idas e voltas de STARTTLS + handshake TLS.")
+    args = parser.parse_args()
+
+    latencia = args.latencia_ms / 1000
+    lotes = [gerar_mensagens(args.mensagens, args.tamanho_kb, prefixo=f"{pdf}.") for pdf in range(args.pdfs)]
+    print(f"--- {args.pdfs} PDF(s) x {args.mensagens} mensagem(ns) de ~{args.tamanho_kb} KB, latência de "
+          f"{args.latencia_ms:.0f} ms por rodada, {args.rodadas_tls} rodada(s) de TLS por sessão ---")
+    cenarios = [(nome, extensoes, False) for nome, extensoes in MODOS_ENVIO]
+    cenarios.append(("CHUNKING, sessão única", MODOS_ENVIO[-1][1], True))
+    tempos, falhas = {}, 0
+    for nome, extensoes, sessao_unica in cenarios:
+        tempos[nome], integras = medir_cenario(nome, extensoes, lotes, latencia, args.rodadas_tls, sessao_unica)
+        falhas += not integras
+
+    base = tempos["passo a passo"]
+    for nome, _, _ in cenarios[1:]:
+        print(f"  {nome}: x{base / tempos[nome]:.2f} mais rápido que o passo a passo")
+
+    print("\n--- Recusas: resultado por mensagem ---")
+    for nome, extensoes in MODOS_ENVIO:
+        falhas += not conferir_recusas(nome, extensoes)
+
+    if falhas:
+        print(f"\n{falhas} cenário(s) entregaram mensagens diferentes das enviadas ou resultados inesperados.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# cnj.py
+import os
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import arquivo_compartilhado
+
+try:
+    import config
+except ImportError:
+    print("ERRO CRÍTICO em cnj.py: O arquivo config.py não foi encontrado ou não pôde ser importado.")
+
+
+    class FallbackConfig:
+        ARQUIVO_MAPA_FOROS = "mapa_foros_comarcas.json"
+        MIN_OCORRENCIAS_MAPA_FOROS = 2
+        AMOSTRA_CONFERENCIA_MAPA_FOROS = 10
+
+
+    config = FallbackConfig()
+
+# Segmentos do Judiciário (dígito J da numeração única)
+SEGMENTOS_JUDICIARIO = {
+    "1": "Supremo Tribunal Federal",
+    "2": "Conselho Nacional de Justiça",
+    "3": "Superior Tribunal de Justiça",
+    "4": "Justiça Federal",
+    "5": "Justiça do Trabalho",
+    "6": "Justiça Eleitoral",
+    "7": "Justiça Militar da União",
+    "8": "Justiça dos Estados e do Distrito Federal e Territórios",
+    "9": "Justiça Militar Estadual",
+}
+
+
+class NumeroCNJ(NamedTuple):
+    """Numeração única do CNJ: NNNNNNN-DD.AAAA.J.TR.OOOO."""
+    sequencial: str
+    digito_verificador: str
+    ano: str
+    segmento: str
+    tribunal: str
+    origem: str
+
+    @property
+    def formatado(self) -> str:
+        return f"{self.sequencial}-{self.digito_verificador}.{self.ano}.{self.segmento}.{self.tribunal}.{self.origem}"
+
+    @property
+    def chave_origem(self) -> str:
+        """Identifica a unidade de origem (foro) de forma única: J.TR.OOOO."""
+        return f"{self.segmento}.{self.tribunal}.{self.origem}"
+
+
+def calcular_digito_verificador(sequencial: str, ano: str, segmento: str, tribunal: str, origem: str) -> str:
+    """Dígito verificador módulo 97 (Resolução CNJ nº 65/2008)."""
+    return f"{98 - int(sequencial + ano + segmento + tribunal + origem + '00') % 97:02d}"
+
+
+def normalizar_valor(valor: str) -> str:
+    """Forma de comparação de vara/comarca: espaços colapsados, sem bordas, minúsculas (como no excel_reader)."""
+    return " ".join(str(valor).split()).lower()
+
+
+def decodificar_cnj(numero_processo: str) -> Optional[NumeroCNJ]:
+    """
+    Decodifica um número de processo no padrão CNJ (com ou sem pontuação, ex.: o nome
+    do arquivo '00009563620218260404'). Retorna None se não tiver 20 dígitos ou se o
+    dígito verificador não conferir.
+    """
+    digitos = re.sub(r"\D", "", numero_processo or "")
+    if len(digitos) != 20:
+        return None
+    numero = NumeroCNJ(digitos[0:7], digitos[7:9], digitos[9:13], digitos[13], digitos[14:16], digitos[16:20])
+    if numero.digito_verificador != calcular_digito_verificador(
+            numero.sequencial, numero.ano, numero.segmento, numero.tribunal, numero.origem):
+        return None
+    return numero
+
+
+class MapaForos:
+    """
+    Tabela foro (J.TR.OOOO) -> comarca/vara aprendida a partir das resoluções bem-sucedidas
+    (email encontrado e enviado) com vara/comarca lidas do texto do PDF, persistida em JSON.
+
+    O código de origem identifica o foro, não a vara; por isso a vara só é considerada
+    conhecida quando todas as resoluções daquele foro apontaram para a mesma vara. Quem usa
+    o mapa ainda precisa confirmar na planilha que a comarca tem uma única Vara Cível antes de
+    dispensar a leitura do PDF, e conferir uma amostra (deve_conferir) lendo o texto mesmo assim.
+
+    Vara e comarca são contadas pela forma normalizada (normalizar_valor): "1ª VARA CÍVEL" e
+    "1ª Vara Cível" são a mesma vara. Para cada forma guarda-se um único texto de exibição (o
+    primeiro visto), que é o gravado no JSON e o devolvido por resolver().
+
+    Vários workers podem compartilhar o arquivo: salvar() relê o JSON sob lock e soma só as
+    ocorrências registradas por este worker desde a última gravação.
+    """
+
+    def __init__(self, caminho_arquivo: Optional[str] = None, min_ocorrencias: Optional[int] = None,
+                 amostra_conferencia: Optional[int] = None):
+        self.caminho_arquivo = caminho_arquivo or config.ARQUIVO_MAPA_FOROS
+        self.min_ocorrencias = min_ocorrencias or config.MIN_OCORRENCIAS_MAPA_FOROS
+        self.amostra_conferencia = amostra_conferencia or getattr(config, "AMOSTRA_CONFERENCIA_MAPA_FOROS", 10)
+        self._foros: Dict[str, Dict[str, Counter]] = {}
+        self._incrementos: Dict[str, Dict[str, Counter]] = {}
+        self._exibicao: Dict[str, Dict[str, str]] = {"comarca": {}, "vara": {}}  # campo -> normalizado -> texto
+        self._resolvidos_pelo_mapa = 0
+
+    def carregar(self):
+        if not os.path.exists(self.caminho_arquivo):
+            return
+        try:
+            self._foros = self._ler_foros()
+            print(f"  [Mapa Foros] {len(self._foros)} foro(s) carregado(s) de '{self.caminho_arquivo}'.")
+        except Exception as e:
+            print(f"  [Mapa Foros] Erro ao ler o mapa de foros ({self.caminho_arquivo}): {e}")
+
+    def _ler_foros(self) -> Dict[str, Dict[str, Counter]]:
+        dados = arquivo_compartilhado.ler_json(self.caminho_arquivo, {})
+        foros = {}
+        for chave, valores in dados.items():
+            foro = foros[chave] = {"comarca": Counter(), "vara": Counter()}
+            for campo in ("comarca", "vara"):
+                for texto, ocorrencias in valores.get(campo, {}).items():
+                    foro[campo][self._normalizar(campo, texto)] += ocorrencias
+        return foros
+
+    def _normalizar(self, campo: str, texto: str) -> str:
+        normalizado = normalizar_valor(texto)
+        self._exibicao[campo].setdefault(normalizado, " ".join(str(texto).split()))
+        return normalizado
+
+    def salvar(self):
+        """Relê o arquivo sob lock, soma as ocorrências novas deste worker e grava (sem perder as dos outros)."""
+        if not self._incrementos:
+            return
+        try:
+            with arquivo_compartilhado.travar_arquivo(self.caminho_arquivo):
+                foros = self._ler_foros()
+                for chave, incremento in self._incrementos.items():
+                    foro = foros.setdefault(chave, {"comarca": Counter(), "vara": Counter()})
+                    foro["comarca"].update(incremento["comarca"])
+                    foro["vara"].update(incremento["vara"])
+                dados = {chave: {campo: {self._exibicao[campo][normalizado]: ocorrencias
+                                         for normalizado, ocorrencias in v[campo].items()}
+                                 for campo in ("comarca", "vara")}
+                         for chave, v in sorted(foros.items())}
+                arquivo_compartilhado.gravar_json_atomico(self.caminho_arquivo, dados, ensure_ascii=False, indent=2)
+            self._foros = foros
+            self._incrementos = {}
+        except Exception as e:
+            print(f"  [Mapa Foros] Erro ao gravar o mapa de foros ({self.caminho_arquivo}): {e}")
+
+    def registrar(self, numero: NumeroCNJ, vara_civel: str, comarca: str):
+        """
+        Aprende com uma resolução bem-sucedida. Só deve ser chamado com vara/comarca lidas do
+        texto do PDF: registrar valores vindos do próprio mapa reforçaria o mapa sem evidência nova.
+        """
+        comarca_norm, vara_norm = self._normalizar("comarca", comarca), self._normalizar("vara", vara_civel)
+        for foros in (self._foros, self._incrementos):
+            foro = foros.setdefault(numero.chave_origem, {"comarca": Counter(), "vara": Counter()})
+            foro["comarca"][comarca_norm] += 1
+            foro["vara"][vara_norm] += 1
+
+    def deve_conferir(self) -> bool:
+        """
+        Chamado a cada PDF resolvido pelo mapa: True para 1 a cada amostra_conferencia deles,
+        que então devem ter o texto lido mesmo assim, para que o mapa possa ser contrariado.
+        """
+        self._resolvidos_pelo_mapa += 1
+        return (self._resolvidos_pelo_mapa - 1) % self.amostra_conferencia == 0
+
+    def comarca_conhecida(self, numero: NumeroCNJ) -> Optional[str]:
+        """Comarca do foro, se todas as resoluções anteriores concordam e há ocorrências suficientes."""
+        return self._valor_unanime(numero.chave_origem, "comarca")
+
+    def resolver(self, numero: NumeroCNJ) -> Optional[Tuple[str, str]]:
+        """(vara_civel, comarca) do foro quando ambos são conhecidos sem ambiguidade; senão None."""
+        return self._resolver_chave(numero.chave_origem)
+
+    def pares_conhecidos(self) -> List[Tuple[str, str]]:
+        """Todos os pares (vara_civel, comarca) que o mapa consegue resolver sem ler o PDF."""
+        return [par for par in map(self._resolver_chave, self._foros) if par]
+
+    def _resolver_chave(self, chave_origem: str) -> Optional[Tuple[str, str]]:
+        comarca = self._valor_unanime(chave_origem, "comarca")
+        vara_civel = self._valor_unanime(chave_origem, "vara")
+        if comarca and vara_civel:
+            return vara_civel, comarca
+        return None
+
+    def _valor_unanime(self, chave_origem: str, campo: str) -> Optional[str]:
+        foro = self._foros.get(chave_origem)
+        if not foro or len(foro[campo]) != 1:
+            return None
+        normalizado, ocorrencias = next(iter(foro[campo].items()))
+        return self._exibicao[campo][normalizado] if ocorrencias >= self.min_ocorrencias else None
@@ -21,6 +21,9 @@ else:
     print(f"AVISO: PORTA_SMTP '{PORTA_SMTP_STR}' não é um número válido ou não foi encontrada no .env. Usando porta padrão 587.")
     PORTA_SMTP = 587 # Porta padrão se a do .env for inválida
 
+# Limite de tamanho de mensagem (bytes) usado quando o servidor não anuncia SIZE no EHLO. None = sem limite.
+LIMITE_TAMANHO_EMAIL_PADRAO = None
+
 # Verificação crítica para variáveis essenciais (especialmente a senha)
 if not EMAIL_REMETENTE:
     print("ERRO CRÍTICO: A variável EMAIL_REMETENTE não foi configurada no arquivo .env.")
@@ -50,10 +53,54 @@ COLUNA_EMAIL_EXCEL = "e-mail"   # <<< ALTERADO (atenção ao minúsculo e hífen
 # Arquivo de log para PDFs já processados
 ARQUIVO_PROCESSADOS_LOG = os.path.join(PASTA_APSDJ, "processos_ja_enviados.txt")
 
+# Mapa foro (código de origem do número CNJ) -> vara/comarca, aprendido com os envios bem-sucedidos
+ARQUIVO_MAPA_FOROS = os.path.join(PASTA_APSDJ, "mapa_foros_comarcas.json")
+# Quantas resoluções concordantes um foro precisa ter antes de dispensar a leitura do PDF
+MIN_OCORRENCIAS_MAPA_FOROS = 2
+# Mesmo com o foro conhecido, 1 a cada N PDFs resolvidos pelo mapa tem o texto lido para conferência
+AMOSTRA_CONFERENCIA_MAPA_FOROS = 10
+
 # Pastas para mover os PDFs após processamento (dentro da PASTA_PROCESSOS_PDF)
 PASTA_PROCESSADOS_SUCESSO = os.path.join(PASTA_PROCESSOS_PDF, "ProcessadosComSucesso")
 PASTA_PROCESSADOS_ERRO = os.path.join(PASTA_PROCESSOS_PDF, "ProcessadosComErro")
 
+# Otimiza o PDF unificado de comprovantes (deduplicação de objetos, compressão de streams, remoção de órfãos)
+OTIMIZAR_PDF_UNIFICADO = True
+
+# Modo --multi-worker: cada worker reivindica PDFs movendo-os para uma subpasta sua aqui dentro
+PASTA_EM_PROCESSAMENTO = os.path.join(PASTA_PROCESSOS_PDF, "EmProcessamento")
+# Após este tempo sem heartbeat, os PDFs de um worker são considerados abandonados e voltam à fila
+TEMPO_EXPIRACAO_LEASE_SEGUNDOS = 600
+
+# Pasta onde o modo --profile grava os perfis (.prof e resumos .txt), uma subpasta por execução
+PASTA_PERFIS = os.path.join(PASTA_APSDJ, "Perfis")
+
+# Estágios pesados (extração de texto com pdfplumber, unificação com PyPDF2) rodam num processo worker
+# isolado; se passarem destes limites o worker é morto e reiniciado e o PDF vai para ProcessadosComErro
+ISOLAR_ESTAGIOS_PESADOS = True
+TEMPO_LIMITE_EXTRACAO_SEGUNDOS = 120
+TEMPO_LIMITE_UNIFICACAO_SEGUNDOS = 300
+LIMITE_MEMORIA_ESTAGIO_MB = 1536  # None para não limitar
+
+# Agendamento da fila de PDFs: critérios aplicados em ordem (remova/reordene para mudar a política)
+# "prazo" (prazos próximos/vencidos), "prioridade" (marcadores + envelhecimento), "custo" (menor primeiro), "chegada"
+CRITERIOS_AGENDAMENTO = ("prazo", "prioridade", "custo", "chegada")
+# A cada intervalo de espera na fila o PDF ganha +1 de prioridade (evita que PDFs grandes fiquem para trás)
+INTERVALO_ENVELHECIMENTO_SEGUNDOS = 900
+# Prazos (marcador <processo>.agenda.json) mais próximos que isto passam à frente
+JANELA_PRAZO_SEGUNDOS = 4 * 3600
+# Prioridade dada pelo marcador vazio <processo>.urgente
+PRIORIDADE_URGENTE = 10
+ARQUIVO_HISTORICO_ESTAGIOS = os.path.join(PASTA_APSDJ, "historico_estagios.json")
+ARQUIVO_TEMPOS_FILA = os.path.join(PASTA_APSDJ, "tempos_fila.csv")
+
+# Extração de Vara/Comarca direto do PDF: documentos longos têm as páginas divididas em blocos lidos em
+# paralelo, e a leitura para assim que os dois campos são encontrados (na ordem do documento)
+EXTRACAO_PARALELA_POR_PAGINAS = True
+PAGINAS_MINIMAS_EXTRACAO_PARALELA = 40  # PDFs menores são lidos sequencialmente
+PROCESSOS_EXTRACAO_PARALELA = None  # None = número de núcleos
+PAGINAS_POR_BLOCO_EXTRACAO = None  # None = automático
+
 # Opcional: Imprimir uma confirmação de que as configurações foram carregadas (para depuração)
 # print(f"Configurações carregadas: Email Remetente: {EMAIL_REMETENTE}, Servidor SMTP: {SERVIDOR_SMTP}:{PORTA_SMTP}")
 # print(f"Planilha de emails: {CAMINHO_PLANILHA_EMAILS}")
@@ -0,0 +1,226 @@
+# coordenacao_workers.py
+import os
+import json
+import time
+import socket
+import zlib
+import threading
+from typing import Optional
+
+try:
+    import config
+except ImportError:
+    print("ERRO CRÍTICO em coordenacao_workers.py: O arquivo config.py não foi encontrado ou não pôde ser importado.")
+
+
+    class FallbackConfig:
+        PASTA_PROCESSOS_PDF = "pasta_processos_nao_configurada"
+        PASTA_EM_PROCESSAMENTO = os.path.join("pasta_processos_nao_configurada", "EmProcessamento")
+        TEMPO_EXPIRACAO_LEASE_SEGUNDOS = 600
+
+
+    config = FallbackConfig()
+
+NOME_ARQUIVO_LEASE = "_lease.json"
+
+
+def _mover_sem_sobrescrever(origem: str, destino: str):
+    """
+    Move origem para destino sem nunca sobrescrever: levanta FileExistsError se o destino existe.
+    No Windows o os.rename já se recusa a sobrescrever; no POSIX ele substituiria o arquivo em silêncio,
+    então o movimento é feito com os.link (que falha se o destino existe) + remoção da origem.
+    """
+    if os.name == "nt":
+        os.rename(origem, destino)
+        return
+    try:
+        os.link(origem, destino)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Sistema de arquivos sem hard links (ex.: alguns compartilhamentos montados)
+        if os.path.exists(destino):
+            raise FileExistsError(destino)
+        os.rename(origem, destino)
+        return
+    os.remove(origem)
+
+
+def id_worker_padrao() -> str:
+    """Identificador padrão do worker: host + PID."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CoordenadorWorkers:
+    """
+    Protocolo de reivindicação de PDFs para vários workers (processos ou máquinas)
+    esvaziando a mesma PASTA_PROCESSOS_PDF compartilhada.
+
+    - Um PDF é reivindicado por rename atômico para PASTA_EM_PROCESSAMENTO/<id_worker>/.
+      Só um worker consegue o rename; os demais recebem FileNotFoundError e pulam o arquivo.
+      Se a pasta do próprio worker sumiu (outro worker julgou seu lease expirado, ex.: heartbeat
+      atrasado num compartilhamento SMB), ela é recriada e o lease renovado.
+    - Cada worker mantém um arquivo de lease na sua pasta, renovado por uma thread de heartbeat.
+      Pastas de workers cujo lease expirou (worker morto) têm seus PDFs devolvidos à fila.
+    - Opcionalmente, os arquivos são particionados por hash do nome (particao/total_particoes),
+      para que cada worker só tente os PDFs da sua partição.
+
+    A entrega é "ao menos uma vez": um PDF devolvido de um worker que caiu durante o envio
+    pode ter seu email reenviado.
+    """
+
+    def __init__(self, id_worker: Optional[str] = None, particao: int = 0, total_particoes: int = 1,
+                 pasta_fila: Optional[str] = None, pasta_em_processamento: Optional[str] = None,
+                 expiracao_lease: Optional[float] = None):
+        self.id_worker = id_worker or id_worker_padrao()
+        self.particao = particao
+        self.total_particoes = max(1, total_particoes)
+        self.pasta_fila = pasta_fila or config.PASTA_PROCESSOS_PDF
+        self.pasta_em_processamento = pasta_em_processamento or config.PASTA_EM_PROCESSAMENTO
+        self.expiracao_lease = expiracao_lease or config.TEMPO_EXPIRACAO_LEASE_SEGUNDOS
+        self.pasta_worker = os.path.join(self.pasta_em_processamento, self.id_worker)
+        self.caminho_lease = os.path.join(self.pasta_worker, NOME_ARQUIVO_LEASE)
+        self._parar_heartbeat = threading.Event()
+        self._thread_heartbeat = None
+
+        if not 0 <= self.particao < self.total_particoes:
+            raise ValueError(f"Partição {self.particao} inválida para {self.total_particoes} partição(ões).")
+
+    def iniciar(self):
+        """Cria a pasta do worker, devolve PDFs de leases expirados e inicia o heartbeat."""
+        os.makedirs(self.pasta_worker, exist_ok=True)
+        # Uma pasta com o mesmo id é de uma execução anterior deste mesmo worker: devolve já.
+        self._devolver_pdfs_da_pasta(self.pasta_worker)
+        self._renovar_lease()
+        self.recuperar_leases_expirados()
+        self._parar_heartbeat.clear()
+        self._thread_heartbeat = threading.Thread(target=self._loop_heartbeat, name="heartbeat-lease", daemon=True)
+        self._thread_heartbeat.start()
+        print(f"  [Coordenador] Worker '{self.id_worker}' ativo (partição {self.particao + 1}/{self.total_particoes}).")
+
+    def encerrar(self):
+        """Para o heartbeat, devolve PDFs ainda reivindicados e remove a pasta do worker."""
+        self._parar_heartbeat.set()
+        if self._thread_heartbeat:
+            self._thread_heartbeat.join(timeout=5)
+        self._devolver_pdfs_da_pasta(self.pasta_worker)
+        self._remover_pasta_se_vazia(self.pasta_worker)
+        print(f"  [Coordenador] Worker '{self.id_worker}' encerrado.")
+
+    def pertence_a_particao(self, nome_pdf: str) -> bool:
+        """Particionamento estável por hash do nome do arquivo."""
+        if self.total_particoes == 1:
+            return True
+        return zlib.crc32(nome_pdf.encode("utf-8")) % self.total_particoes == self.particao
+
+    def reivindicar(self, nome_pdf: str) -> Optional[str]:
+        """
+        Tenta reivindicar o PDF por rename atômico. Retorna o novo caminho do PDF,
+        ou None se outro worker já o reivindicou (ou se ele não é desta partição).
+        """
+        if not self.pertence_a_particao(nome_pdf):
+            return None
+        origem = os.path.join(self.pasta_fila, nome_pdf)
+        destino = os.path.join(self.pasta_worker, nome_pdf)
+        for tentativa in range(2):
+            try:
+                os.rename(origem, destino)
+                return destino
+            except FileNotFoundError:
+                if tentativa == 0 and not os.path.isdir(self.pasta_worker):
+                    # O FileNotFoundError veio do destino, não da origem: recria a pasta e tenta de novo
+                    self._renovar_lease()
+                    if os.path.isdir(self.pasta_worker):
+                        continue
+                    print(f"  [Coordenador] ERRO: sem a pasta do worker '{self.pasta_worker}', "
+                          f"'{nome_pdf}' não pode ser reivindicado.")
+                    return None
+                print(f"  [Coordenador] PDF '{nome_pdf}' já foi reivindicado por outro worker. Pulando.")
+                return None
+            except OSError as e:
+                print(f"  [Coordenador] Não foi possível reivindicar '{nome_pdf}': {e}")
+                return None
+        return None
+
+    def recuperar_leases_expirados(self) -> int:
+        """Devolve à fila os PDFs de workers cujo lease expirou. Retorna quantos PDFs foram devolvidos."""
+        devolvidos = 0
+        try:
+            with os.scandir(self.pasta_em_processamento) as it:
+                pastas = [e for e in it if e.is_dir() and e.name != self.id_worker]
+        except OSError as e:
+            print(f"  [Coordenador] Erro ao varrer '{self.pasta_em_processamento}': {e}")
+            return 0
+        agora = time.time()
+        for pasta in pastas:
+            caminho_lease = os.path.join(pasta.path, NOME_ARQUIVO_LEASE)
+            try:
+                ultimo_heartbeat = os.stat(caminho_lease).st_mtime
+            except FileNotFoundError:
+                # Sem lease (worker caiu antes de gravá-lo): usa o mtime da própria pasta
+                ultimo_heartbeat = pasta.stat().st_mtime
+            except OSError:
+                continue
+            if agora - ultimo_heartbeat <= self.expiracao_lease:
+                continue
+            print(
+                f"  [Coordenador] Lease do worker '{pasta.name}' expirado há {agora - ultimo_heartbeat:.0f}s. Devolvendo seus PDFs à fila.")
+            devolvidos += self._devolver_pdfs_da_pasta(pasta.path)
+            self._remover_pasta_se_vazia(pasta.path)
+        return devolvidos
+
+    def _devolver_pdfs_da_pasta(self, pasta: str) -> int:
+        devolvidos = 0
+        try:
+            nomes = os.listdir(pasta)
+        except OSError:
+            return 0
+        for nome in nomes:
+            if not nome.lower().endswith(".pdf"):
+                continue
+            try:
+                # Atômico e sem sobrescrever: se dois workers tentarem recuperar, só um consegue
+                _mover_sem_sobrescrever(os.path.join(pasta, nome), os.path.join(self.pasta_fila, nome))
+                devolvidos += 1
+                print(f"    -> PDF '{nome}' devolvido à fila.")
+            except FileExistsError:
+                # Um PDF com o mesmo nome voltou à fila: este fica onde está (nunca é apagado)
+                print(f"    -> PDF '{nome}' já existe na fila; mantido em '{pasta}' para conferência manual.")
+            except OSError:
+                continue
+        return devolvidos
+
+    def _remover_pasta_se_vazia(self, pasta: str):
+        """Remove o lease e a pasta do worker, mas só se não restou nenhum PDF nela."""
+        try:
+            if any(nome.lower().endswith(".pdf") for nome in os.listdir(pasta)):
+                print(f"  [Coordenador] A pasta '{pasta}' ainda contém PDFs e não será removida.")
+                return
+            caminho_lease = os.path.join(pasta, NOME_ARQUIVO_LEASE)
+            if os.path.exists(caminho_lease):
+                os.remove(caminho_lease)
+            os.rmdir(pasta)
+        except OSError as e:
+            print(f"  [Coordenador] Não foi possível remover a pasta '{pasta}': {e}")
+
+    def _renovar_lease(self):
+        if not os.path.isdir(self.pasta_worker):
+            # Pasta removida por outro worker que julgou o lease expirado: este worker continua vivo
+            print(f"  [Coordenador] ERRO: a pasta do worker '{self.pasta_worker}' foi removida (lease dado como "
+                  f"expirado por outro worker?). Recriando-a e renovando o lease.")
+            try:
+                os.makedirs(self.pasta_worker, exist_ok=True)
+            except OSError as e:
+                print(f"  [Coordenador] Erro ao recriar a pasta do worker '{self.id_worker}': {e}")
+                return
+        try:
+            with open(self.caminho_lease, "w", encoding="utf-8") as f:
+                json.dump({"id_worker": self.id_worker, "host": socket.gethostname(), "pid": os.getpid(),
+                           "heartbeat": time.strftime('%Y-%m-%d %H:%M:%S')}, f)
+        except OSError as e:
+            print(f"  [Coordenador] Erro ao renovar o lease de '{self.id_worker}': {e}")
+
+    def _loop_heartbeat(self):
+        intervalo = max(1.0, self.expiracao_lease / 3)
+        while not self._parar_heartbeat.wait(intervalo):
+            self._renovar_lease()
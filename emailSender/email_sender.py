@@ -1,24 +1,70 @@
 # email_sender.py
 import os
+import math
 import smtplib
 import ssl
 import socket
+import tempfile
 import certifi  # Importa a biblioteca certifi
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from typing import List
+from typing import List, Optional
 import config
+import pdf_processor
+from smtp_pipelining import SMTPPipelining
 
+# Folga sobre o limite SIZE do servidor (cabeçalhos que o próprio servidor acrescenta etc.)
+MARGEM_LIMITE_BYTES = 4 * 1024
+# Estimativa dos cabeçalhos MIME de cada anexo (Content-Type, Content-Disposition, boundary)
+CABECALHO_ANEXO_BYTES = 512
 
-def enviar_email(destinatario: str, numero_processo: str, caminhos_anexos: List[str]) -> bool:
-    """Monta e envia o email com a mensagem e assinatura atualizadas."""
+
+def tamanho_base64(tamanho_bruto: int) -> int:
+    """Tamanho de um anexo depois da codificação base64 do MIME (linhas de 76 caracteres + CRLF)."""
+    codificado = 4 * math.ceil(tamanho_bruto / 3)
+    return codificado + 2 * math.ceil(codificado / 76)
+
+
+def tamanho_bruto_maximo(tamanho_codificado: int) -> int:
+    """Inverso aproximado de tamanho_base64: maior anexo bruto cujo base64 cabe em tamanho_codificado."""
+    return max(0, (tamanho_codificado * 76 // 78) * 3 // 4 - 3)
+
+
+def tamanho_mensagem(mensagem: MIMEMultipart) -> int:
+    """Tamanho exato da mensagem como vai para o DATA (linhas terminadas em CRLF)."""
+    return len(mensagem.as_bytes(policy=mensagem.policy.clone(linesep="\r\n")))
+
+
+def limite_tamanho_servidor(server: smtplib.SMTP) -> Optional[int]:
+    """Limite SIZE anunciado no EHLO (RFC 1870); None se o servidor não anuncia limite."""
+    valor = server.esmtp_features.get("size", "").strip()
+    if valor.isdigit() and int(valor) > 0:
+        return int(valor)
+    return getattr(config, "LIMITE_TAMANHO_EMAIL_PADRAO", None)
+
+
+def _montar_mensagem(destinatario: str, numero_processo: str, caminhos_anexos: List[str],
+                     parte: int = 1, total_partes: int = 1, silencioso: bool = False) -> MIMEMultipart:
+    """
+    Monta o email com a mensagem e assinatura atualizadas.
+    'silencioso' suprime o log de progresso (para mensagens só medidas, nunca enviadas); alertas continuam.
+    """
     assunto = f"Encaminhamento Comprovante - Processo nº {numero_processo}"
+    if total_partes > 1:
+        assunto += f" (parte {parte}/{total_partes})"
 
     # --- CORPO DO EMAIL ATUALIZADO COM A NOVA ASSINATURA ---
     corpo_email = (
         f"Prezados(as),\n\n"
         f"Encaminho em anexo comprovante(s) de cumprimento referente ao processo número {numero_processo}.\n\n"
+    )
+    if total_partes > 1:
+        corpo_email += (
+            f"Devido ao tamanho, os comprovantes foram divididos em {total_partes} mensagens. "
+            f"Esta é a parte {parte} de {total_partes}.\n\n"
+        )
+    corpo_email += (
         f"Atenciosamente,\n\n"
         f"Priscila Ribeiro\n"
         f"Técnica do Seguro Social\n"
@@ -33,12 +79,12 @@ def enviar_email(destinatario: str, numero_processo: str, caminhos_anexos: List[
     mensagem["Subject"] = assunto
     mensagem.attach(MIMEText(corpo_email, "plain", "utf-8"))
 
-    print(f"  [Email Sender] Preparando email para: {destinatario}, Assunto: {assunto}")
-
-    if not caminhos_anexos:
-        print("    - Nenhum anexo a ser enviado.")
-    else:
-        print(f"    - Anexando {len(caminhos_anexos)} arquivo(s)...")
+    if not silencioso:
+        print(f"  [Email Sender] Preparando email para: {destinatario}, Assunto: {assunto}")
+        if not caminhos_anexos:
+            print("    - Nenhum anexo a ser enviado.")
+        else:
+            print(f"    - Anexando {len(caminhos_anexos)} arquivo(s)...")
 
     for caminho_anexo in caminhos_anexos:
         if not os.path.exists(caminho_anexo):
@@ -47,35 +93,188 @@ def enviar_email(destinatario: str, numero_processo: str, caminhos_anexos: List[
         try:
             nome_arquivo_anexo = os.path.basename(caminho_anexo)
             with open(caminho_anexo, "rb") as anexo_file:
-                parte = MIMEApplication(anexo_file.read(), Name=nome_arquivo_anexo)
-            parte['Content-Disposition'] = f'attachment; filename="{nome_arquivo_anexo}"'
-            mensagem.attach(parte)
-            print(f"      -> Anexado: {nome_arquivo_anexo}")
+                parte_mime = MIMEApplication(anexo_file.read(), Name=nome_arquivo_anexo)
+            parte_mime['Content-Disposition'] = f'attachment; filename="{nome_arquivo_anexo}"'
+            mensagem.attach(parte_mime)
+            if not silencioso:
+                print(f"      -> Anexado: {nome_arquivo_anexo}")
         except Exception as e:
             print(f"    - Erro ao anexar o arquivo {caminho_anexo}: {e}")
+    return mensagem
 
-    try:
+
+def planejar_mensagens(destinatario: str, numero_processo: str, caminhos_anexos: List[str],
+                       limite: Optional[int], pasta_partes: str) -> Optional[List[MIMEMultipart]]:
+    """
+    Planeja o envio respeitando o limite SIZE do servidor, antes de qualquer byte da mensagem ir para a rede.
+
+    O tamanho codificado (base64) é estimado a partir do tamanho dos arquivos. Se o total passar do limite,
+    PDFs grandes são divididos por intervalos de páginas e os pedaços distribuídos em mensagens numeradas
+    ("parte 1/3") do mesmo processo. Retorna as mensagens prontas, ou None se não for possível respeitar o limite.
+    """
+    anexos = [caminho for caminho in caminhos_anexos if os.path.exists(caminho)]
+    if limite is None:
+        return [_montar_mensagem(destinatario, numero_processo, caminhos_anexos)]
+
+    limite_util = limite - MARGEM_LIMITE_BYTES
+    # Mensagem sem anexos, com o maior assunto/corpo possível (de parte N/N), mede o custo fixo
+    base = tamanho_mensagem(_montar_mensagem(destinatario, numero_processo, [], 99, 99, silencioso=True))
+    custos = {caminho: tamanho_base64(os.path.getsize(caminho)) + CABECALHO_ANEXO_BYTES for caminho in anexos}
+    total_estimado = base + sum(custos.values())
+    print(f"  [Email Sender] Tamanho estimado da mensagem: {total_estimado} bytes (limite SIZE do servidor: {limite}).")
+
+    if total_estimado <= limite_util:
+        mensagens = [_montar_mensagem(destinatario, numero_processo, caminhos_anexos)]
+    else:
+        orcamento_anexo = limite_util - base - CABECALHO_ANEXO_BYTES
+        if orcamento_anexo <= 0:
+            print("  [Email Sender] Limite SIZE do servidor é menor que a própria mensagem sem anexos.")
+            return None
+        pedacos = []
+        for caminho in anexos:
+            if base + custos[caminho] <= limite_util:
+                pedacos.append(caminho)
+            elif caminho.lower().endswith(".pdf"):
+                partes = pdf_processor.dividir_pdf_em_partes(caminho, tamanho_bruto_maximo(orcamento_anexo), pasta_partes)
+                if not partes:
+                    return None
+                pedacos.extend(partes)
+            else:
+                print(f"  [Email Sender] Anexo '{os.path.basename(caminho)}' excede o limite do servidor e não é um PDF divisível.")
+                return None
+
+        # Distribui os pedaços, em ordem, no menor número de mensagens sequenciais
+        grupos, grupo_atual, tamanho_atual = [], [], base
+        for pedaco in pedacos:
+            custo = tamanho_base64(os.path.getsize(pedaco)) + CABECALHO_ANEXO_BYTES
+            if grupo_atual and tamanho_atual + custo > limite_util:
+                grupos.append(grupo_atual)
+                grupo_atual, tamanho_atual = [], base
+            grupo_atual.append(pedaco)
+            tamanho_atual += custo
+        grupos.append(grupo_atual)
+        print(f"  [Email Sender] Anexos divididos em {len(grupos)} mensagem(ns) para respeitar o limite do servidor.")
+        mensagens = [_montar_mensagem(destinatario, numero_processo, grupo, i, len(grupos))
+                     for i, grupo in enumerate(grupos, start=1)]
+
+    # Conferência final com o tamanho real (a estimativa é só para planejar)
+    for i, mensagem in enumerate(mensagens, start=1):
+        tamanho_real = tamanho_mensagem(mensagem)
+        if tamanho_real > limite:
+            print(f"  [Email Sender] Mensagem {i}/{len(mensagens)} tem {tamanho_real} bytes, acima do limite SIZE de {limite}.")
+            return None
+    return mensagens
+
+
+class SessaoSMTP:
+    """
+    Sessão SMTP autenticada reaproveitada por todos os emails de uma execução: conexão, STARTTLS
+    e AUTH (várias idas e voltas até o servidor) são pagos uma vez, e não a cada PDF.
+
+    A conexão é aberta no primeiro envio. Antes de cada reaproveitamento, um RSET confere que o
+    servidor não derrubou a sessão por inatividade (comum enquanto o próximo PDF é processado) e
+    limpa qualquer transação deixada aberta por uma mensagem recusada; se a sessão caiu
+    (SMTPServerDisconnected), uma nova é aberta. Um lote que cai no meio do envio não é repetido,
+    para não duplicar mensagens: o PDF falha e a sessão é descartada.
+    """
+
+    def __init__(self):
+        self._servidor: Optional[SMTPPipelining] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def _conectar(self) -> SMTPPipelining:
         cafile_path = certifi.where()
         context = ssl.create_default_context(cafile=cafile_path)
         print(f"  [Email Sender] Usando contexto SSL padrão com CAFile explícito de certifi: {cafile_path}")
-
-        with smtplib.SMTP(config.SERVIDOR_SMTP, config.PORTA_SMTP) as server:
-            print(f"  [Email Sender] Conectando ao servidor SMTP: {config.SERVIDOR_SMTP}:{config.PORTA_SMTP}...")
-            server.ehlo()
-            server.starttls(context=context)
-            server.ehlo()
+        print(f"  [Email Sender] Conectando ao servidor SMTP: {config.SERVIDOR_SMTP}:{config.PORTA_SMTP}...")
+        servidor = SMTPPipelining(config.SERVIDOR_SMTP, config.PORTA_SMTP)
+        try:
+            servidor.ehlo()
+            servidor.starttls(context=context)
+            servidor.ehlo()
             print(f"  [Email Sender] Fazendo login com o usuário: {config.EMAIL_REMETENTE}...")
-            server.login(config.EMAIL_REMETENTE, config.SENHA_REMETENTE)
-            print(f"  [Email Sender] Enviando email para {destinatario}...")
-            server.sendmail(config.EMAIL_REMETENTE, destinatario, mensagem.as_string())
+            servidor.login(config.EMAIL_REMETENTE, config.SENHA_REMETENTE)
+        except BaseException:
+            servidor.close()
+            raise
+        return servidor
+
+    def obter(self) -> SMTPPipelining:
+        """Servidor autenticado, pronto para uma nova transação; reconecta se a sessão anterior caiu."""
+        if self._servidor is not None:
+            try:
+                codigo, _ = self._servidor.rset()
+                if codigo == 250:
+                    return self._servidor
+            except (smtplib.SMTPServerDisconnected, OSError):
+                pass
+            print("  [Email Sender] A sessão SMTP anterior foi encerrada pelo servidor. Reconectando...")
+            self.descartar()
+        self._servidor = self._conectar()
+        return self._servidor
+
+    def descartar(self):
+        """Fecha a conexão sem QUIT (após erros, quando o estado da sessão é incerto)."""
+        if self._servidor is not None:
+            self._servidor.close()
+            self._servidor = None
+
+    def encerrar(self):
+        """Encerra a sessão com QUIT, se houver uma aberta."""
+        if self._servidor is not None:
+            try:
+                self._servidor.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.descartar()
+
+
+def enviar_email(destinatario: str, numero_processo: str, caminhos_anexos: List[str],
+                 sessao: Optional[SessaoSMTP] = None) -> bool:
+    """
+    Monta e envia o email com a mensagem e assinatura atualizadas.
+    Se os anexos excederem o limite SIZE do servidor, o envio é dividido em várias mensagens numeradas.
+    As mensagens vão todas na mesma sessão, com PIPELINING/CHUNKING quando o servidor oferece.
+    'sessao' é a SessaoSMTP da execução (opcional; sem ela, uma sessão é aberta e fechada só para este email).
+    """
+    sessao_propria = sessao is None
+    if sessao_propria:
+        sessao = SessaoSMTP()
+    try:
+        with tempfile.TemporaryDirectory(prefix="partes_email_") as pasta_partes:
+            server = sessao.obter()
+
+            mensagens = planejar_mensagens(destinatario, numero_processo, caminhos_anexos,
+                                           limite_tamanho_servidor(server), pasta_partes)
+            if not mensagens:
+                print(f"  [Email Sender] Não foi possível montar mensagens dentro do limite do servidor. Nada foi enviado.")
+                return False
+
+            modo = "BDAT" if server.has_extn("chunking") else "PIPELINING" if server.has_extn("pipelining") else "sequencial"
+            print(f"  [Email Sender] Enviando {len(mensagens)} email(s) para {destinatario} (modo: {modo})...")
+            politica_crlf = mensagens[0].policy.clone(linesep="\r\n")
+            resultados = server.enviar_lote(config.EMAIL_REMETENTE, [destinatario],
+                                            [mensagem.as_bytes(policy=politica_crlf) for mensagem in mensagens])
+            falhas = [(i, resultado) for i, resultado in enumerate(resultados, start=1) if not resultado.sucesso]
+            for i, resultado in falhas:
+                print(f"  [Email Sender] Email {i}/{len(mensagens)} recusado pelo servidor: {resultado.detalhe}")
+            if falhas:
+                return False
         print(
             f"  [Email Sender] Email enviado com sucesso para {destinatario} referente ao processo {numero_processo}!")
         return True
     except smtplib.SMTPAuthenticationError:
+        sessao.descartar()
         print(f"  [Email Sender] Erro de AUTENTICAÇÃO SMTP para {config.EMAIL_REMETENTE}.")
         print(f"  Verifique email/senha e configurações de segurança da conta (ex: 'app password').")
         return False
     except smtplib.SMTPException as e:
+        sessao.descartar()
         print(f"  [Email Sender] Erro SMTP ao enviar email para {destinatario}: {e}")
         return False
     except socket.gaierror:
@@ -83,6 +282,10 @@ def enviar_email(destinatario: str, numero_processo: str, caminhos_anexos: List[
             f"  [Email Sender] Erro de rede: Não foi possível encontrar o servidor SMTP '{config.SERVIDOR_SMTP}'. Verifique o nome e sua conexão.")
         return False
     except Exception as e:
+        sessao.descartar()
         print(f"  [Email Sender] Erro geral e inesperado ao enviar email para {destinatario}: {e}")
         print(f"  Tipo de erro: {type(e).__name__}")
-        return False
\ No newline at end of file
+        return False
+    finally:
+        if sessao_propria:
+            sessao.encerrar()
@@ -1,7 +1,8 @@
 # excel_reader.py
 import os
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Dict, Iterable, Optional, Set, Tuple
 
 # Tente importar config e avise se faltar
 try:
@@ -109,6 +110,133 @@ def buscar_email_vara(vara_civel_pdf: str, comarca_pdf: str) -> Optional[str]:
         return None
 
 
+def carregar_planilha_normalizada() -> Optional[pd.DataFrame]:
+    """
+    Lê a planilha uma vez e devolve só as linhas utilizáveis (vara e comarca preenchidas, email com '@'),
+    na ordem original, com as colunas normalizadas 'vara_norm', 'comarca_norm' e 'email'.
+    """
+    if not os.path.exists(config.CAMINHO_PLANILHA_EMAILS):
+        print(f"  [Excel Reader] Erro: Planilha de emails não encontrada em '{config.CAMINHO_PLANILHA_EMAILS}'")
+        return None
+    try:
+        df = pd.read_excel(config.CAMINHO_PLANILHA_EMAILS, engine='xlrd')
+    except Exception as e:
+        print(f"  [Excel Reader] Erro ao ler a planilha Excel: {e}")
+        print(f"  Tipo de erro: {type(e).__name__}")
+        return None
+
+    def coluna_normalizada(nome_coluna: str) -> pd.Series:
+        if nome_coluna not in df.columns:
+            print(f"  [Excel Reader] ATENÇÃO: coluna '{nome_coluna}' não encontrada. Colunas: {df.columns.tolist()}")
+            return pd.Series([""] * len(df), index=df.index)
+        return df[nome_coluna].where(df[nome_coluna].notna(), "").astype(str).str.strip()
+
+    normalizada = pd.DataFrame({
+        "vara_norm": coluna_normalizada(config.COLUNA_VARA_EXCEL).str.lower(),
+        "comarca_norm": coluna_normalizada(config.COLUNA_COMARCA_EXCEL).str.lower(),
+        "email": coluna_normalizada(config.COLUNA_EMAIL_EXCEL),
+        "linha_excel": df.index + 2,
+    })
+    validas = (normalizada["vara_norm"] != "") & (normalizada["comarca_norm"] != "") & \
+        normalizada["email"].str.contains("@", regex=False)
+    normalizada = normalizada[validas].reset_index(drop=True)
+    print(
+        f"  [Excel Reader] Planilha '{os.path.basename(config.CAMINHO_PLANILHA_EMAILS)}' carregada: {len(normalizada)} linha(s) utilizável(is) de {len(df)}.")
+    return normalizada
+
+
+def resolver_emails_lote(pares: Iterable[Tuple[str, str]], planilha: Optional[pd.DataFrame] = None) \
+        -> Tuple[Dict[Tuple[str, str], str], Set[Tuple[str, str]]]:
+    """
+    Resolve de uma vez vários pares (vara, comarca) extraídos dos PDFs.
+
+    Mesma regra de buscar_email_vara (o valor da planilha deve estar contido no valor do PDF,
+    vale a primeira linha da planilha com email válido), mas os pares são deduplicados e
+    comparados contra todas as linhas numa única operação vetorizada (matriz pares x linhas).
+    Retorna (mapa par -> email, conjunto de pares não resolvidos).
+    """
+    pares_unicos = list(dict.fromkeys((str(v), str(c)) for v, c in pares))
+    if not pares_unicos:
+        return {}, set()
+    if planilha is None:
+        planilha = carregar_planilha_normalizada()
+    if planilha is None or planilha.empty:
+        return {}, set(pares_unicos)
+
+    varas_pdf = np.array([v.strip().lower() for v, _ in pares_unicos], dtype=str)[:, np.newaxis]
+    comarcas_pdf = np.array([c.strip().lower() for _, c in pares_unicos], dtype=str)[:, np.newaxis]
+    varas_excel = planilha["vara_norm"].to_numpy(dtype=str)[np.newaxis, :]
+    comarcas_excel = planilha["comarca_norm"].to_numpy(dtype=str)[np.newaxis, :]
+
+    # np.char.find(a, sub) >= 0  <=>  sub in a, com broadcasting (pares x linhas)
+    corresponde = (np.char.find(varas_pdf, varas_excel) >= 0) & (np.char.find(comarcas_pdf, comarcas_excel) >= 0)
+    tem_correspondencia = corresponde.any(axis=1)
+    primeira_linha = corresponde.argmax(axis=1)
+
+    emails = planilha["email"].to_numpy()
+    resolvidos = {}
+    nao_resolvidos = set()
+    for i, par in enumerate(pares_unicos):
+        if tem_correspondencia[i]:
+            resolvidos[par] = emails[primeira_linha[i]]
+        else:
+            nao_resolvidos.add(par)
+    print(
+        f"  [Excel Reader] Resolução em lote: {len(resolvidos)} de {len(pares_unicos)} par(es) (vara, comarca) resolvido(s).")
+    return resolvidos, nao_resolvidos
+
+
+class ResolvedorEmails:
+    """
+    Resolvedor com escopo de uma execução: a planilha é lida e normalizada uma única vez,
+    e cada par (vara, comarca) distinto é resolvido uma única vez (resolver_emails_lote).
+    """
+
+    def __init__(self):
+        self._planilha = None
+        self._cache: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def resolver_lote(self, pares: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Resolve antecipadamente vários pares, guardando o resultado (inclusive os não resolvidos)."""
+        if self._planilha is None:
+            # Se a leitura falhar, usa uma planilha vazia para não tentar ler de novo a cada PDF
+            self._planilha = carregar_planilha_normalizada()
+            if self._planilha is None:
+                self._planilha = pd.DataFrame(columns=["vara_norm", "comarca_norm", "email", "linha_excel"])
+        pendentes = [(str(v), str(c)) for v, c in pares if (str(v), str(c)) not in self._cache]
+        if pendentes:
+            resolvidos, nao_resolvidos = resolver_emails_lote(pendentes, self._planilha)
+            self._cache.update(resolvidos)
+            self._cache.update(dict.fromkeys(nao_resolvidos))
+        return {par: email for par, email in self._cache.items() if email}
+
+    def comarca_tem_vara_unica(self, comarca_pdf: str) -> bool:
+        """
+        True se a planilha tem exatamente uma Vara Cível para a comarca (mesma regra de
+        correspondência da busca: o valor da planilha contido no valor do PDF).
+        """
+        if self._planilha is None:
+            self.resolver_lote([])
+        if self._planilha.empty:
+            return False
+        comarca_norm = str(comarca_pdf).strip().lower()
+        comarcas_excel = self._planilha["comarca_norm"].to_numpy(dtype=str)
+        da_comarca = np.char.find(comarca_norm, comarcas_excel) >= 0
+        return self._planilha.loc[da_comarca, "vara_norm"].nunique() == 1
+
+    def buscar(self, vara_civel_pdf: str, comarca_pdf: str) -> Optional[str]:
+        """Equivalente a buscar_email_vara, usando o cache/lote da execução."""
+        par = (str(vara_civel_pdf), str(comarca_pdf))
+        if par not in self._cache:
+            self.resolver_lote([par])
+        email = self._cache.get(par)
+        if email:
+            print(f"  [Excel Reader] Email encontrado para Vara: '{vara_civel_pdf}', Comarca: '{comarca_pdf}' -> {email}")
+        else:
+            print(f"  [Excel Reader] Email não encontrado para Vara: '{vara_civel_pdf}', Comarca: '{comarca_pdf}' na planilha.")
+        return email
+
+
 # Bloco de teste
 if __name__ == "__main__":
     print("--- Iniciando Teste do Módulo excel_reader.py ---")
@@ -0,0 +1,172 @@
+# extracao_paralela.py
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import extrator_campos
+import worker_extracao
+
+try:
+    import pdfplumber
+except ImportError:
+    print("ERRO: A biblioteca 'pdfplumber' não está instalada. Por favor, instale com: pip install pdfplumber")
+    pdfplumber = None
+
+try:
+    import config
+except ImportError:
+    print("ERRO CRÍTICO em extracao_paralela.py: O arquivo config.py não foi encontrado ou não pôde ser importado.")
+
+
+    class FallbackConfig:
+        PAGINAS_MINIMAS_EXTRACAO_PARALELA = 40
+        PROCESSOS_EXTRACAO_PARALELA = None
+        PAGINAS_POR_BLOCO_EXTRACAO = None
+
+
+    config = FallbackConfig()
+
+# Blocos por processo quando o tamanho do bloco é automático: blocos menores permitem
+# parar mais cedo quando o cabeçalho está no início, sem abrir o PDF vezes demais
+BLOCOS_POR_PROCESSO = 4
+PAGINAS_MINIMAS_POR_BLOCO = 4
+
+# Pool de processos persistente, criado no primeiro PDF longo e reaproveitado pelos seguintes
+_pool = None
+_processos_pool = 0
+# Cada PDF lido pelo pool é uma geração; ao decidir os campos, a geração é marcada como cancelada
+# no valor compartilhado e os blocos restantes dela param na próxima página, sem reiniciar o pool
+_geracao = 0
+_geracao_cancelada = None
+
+
+class CamposPaginados(NamedTuple):
+    """Vara/Comarca da primeira ocorrência no documento e a página (1-based) de cada uma."""
+    vara_civel: Optional[str]
+    comarca: Optional[str]
+    pagina_vara_civel: Optional[int]
+    pagina_comarca: Optional[int]
+
+    def como_dict(self) -> dict:
+        return {campo: valor for campo, valor in (("vara_civel", self.vara_civel), ("comarca", self.comarca)) if valor}
+
+
+def _obter_pool(processos: int):
+    """Devolve o pool persistente deste processo, criando-o (ou recriando-o com outro tamanho) se preciso."""
+    global _pool, _processos_pool, _geracao_cancelada
+    if _pool is not None and _processos_pool == processos:
+        return _pool
+    encerrar_pool()
+    contexto = worker_extracao.ContextoLeve()
+    _geracao_cancelada = contexto.RawValue("l", 0)
+    _pool = contexto.Pool(processos, initializer=worker_extracao.inicializar, initargs=(_geracao_cancelada,))
+    _processos_pool = processos
+    return _pool
+
+
+def encerrar_pool():
+    """
+    Encerra o pool persistente, se houver. Na saída normal do processo os finalizadores do
+    multiprocessing também o encerram; se o worker do isolamento_estagios é morto, o pool morre junto.
+    """
+    global _pool
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+        _pool = None
+
+
+def _resolver(inicios_blocos: List[int], resultados: Dict[int, dict]) -> Optional[Dict[str, Optional[Tuple[str, int]]]]:
+    """
+    Decide cada campo pela primeira ocorrência em ordem de documento: o campo está resolvido quando
+    um bloco o contém e todos os blocos anteriores já terminaram sem ele (ou quando todos terminaram).
+    Retorna None enquanto algum campo ainda depende de um bloco pendente.
+    """
+    decididos = {}
+    for campo in extrator_campos.CAMPOS:
+        for inicio in inicios_blocos:
+            if inicio not in resultados:
+                return None
+            if campo in resultados[inicio]:
+                decididos[campo] = resultados[inicio][campo]
+                break
+        else:
+            decididos[campo] = None
+    return decididos
+
+
+def _montar_resultado(decididos: Dict[str, Optional[Tuple[str, int]]]) -> CamposPaginados:
+    vara, comarca = decididos.get("vara_civel"), decididos.get("comarca")
+    return CamposPaginados(vara[0] if vara else None, comarca[0] if comarca else None,
+                           vara[1] if vara else None, comarca[1] if comarca else None)
+
+
+def extrair_campos_do_pdf(caminho_pdf: str, processos: Optional[int] = None,
+                          paginas_por_bloco: Optional[int] = None) -> Optional[CamposPaginados]:
+    """
+    Extrai Vara/Comarca direto do PDF. PDFs com pelo menos config.PAGINAS_MINIMAS_EXTRACAO_PARALELA
+    páginas têm o intervalo de páginas dividido em blocos, processados em paralelo por um pool de
+    processos persistente; assim que os dois campos estão decididos pela ordem do documento, os
+    blocos restantes são cancelados. PDFs curtos são lidos sequencialmente neste processo.
+
+    Os processos do pool herdam o RLIMIT_AS deste processo cada um; o limite do conjunto é a soma
+    de memória residente vigiada pelo isolamento_estagios (com psutil).
+
+    Retorna None se o PDF não puder ser lido (mesma semântica de extrair_texto_do_pdf).
+    """
+    global _geracao
+    nome_pdf = os.path.basename(caminho_pdf)
+    if not pdfplumber:
+        print("  [PDF Extractor] pdfplumber não está disponível. Não é possível extrair texto.")
+        return None
+    try:
+        with pdfplumber.open(caminho_pdf) as pdf:
+            total_paginas = len(pdf.pages)
+    except Exception as e:
+        print(f"  [PDF Extractor] Erro ao ler o PDF {nome_pdf}: {e}")
+        return None
+
+    processos_pool = processos or config.PROCESSOS_EXTRACAO_PARALELA or os.cpu_count() or 1
+    processos = min(processos_pool, max(1, total_paginas // PAGINAS_MINIMAS_POR_BLOCO))
+    if total_paginas < config.PAGINAS_MINIMAS_EXTRACAO_PARALELA or processos < 2:
+        try:
+            _, achados = worker_extracao.escanear_bloco((caminho_pdf, 0, total_paginas, None))
+        except Exception as e:
+            print(f"  [PDF Extractor] Erro ao ler o PDF {nome_pdf}: {e}")
+            return None
+        finally:
+            worker_extracao.fechar_pdf()
+        return _montar_resultado(achados)
+
+    _geracao += 1
+    geracao = _geracao
+
+    paginas_por_bloco = paginas_por_bloco or config.PAGINAS_POR_BLOCO_EXTRACAO or \
+        max(PAGINAS_MINIMAS_POR_BLOCO, -(-total_paginas // (processos * BLOCOS_POR_PROCESSO)))
+    blocos = [(caminho_pdf, inicio, min(inicio + paginas_por_bloco, total_paginas), geracao)
+              for inicio in range(0, total_paginas, paginas_por_bloco)]
+    inicios_blocos = [inicio for _, inicio, _, _ in blocos]
+    print(f"  [PDF Extractor] {nome_pdf}: {total_paginas} páginas em {len(blocos)} bloco(s) "
+          f"de {paginas_por_bloco}, {processos} processo(s).")
+
+    resultados: Dict[int, dict] = {}
+    decididos = None
+    try:
+        pool = _obter_pool(processos_pool)
+        # chunksize=1: os blocos são despachados na ordem do documento
+        for inicio, achados in pool.imap_unordered(worker_extracao.escanear_bloco, blocos, chunksize=1):
+            resultados[inicio] = achados
+            decididos = _resolver(inicios_blocos, resultados)
+            if decididos is not None:
+                break
+    except Exception as e:
+        print(f"  [PDF Extractor] Erro ao ler o PDF {nome_pdf}: {e}")
+        return None
+    finally:
+        # Os blocos posteriores, na fila ou em leitura, param na próxima página; o pool segue para o próximo PDF
+        if _geracao_cancelada is not None:
+            _geracao_cancelada.value = geracao
+
+    if len(resultados) < len(blocos):
+        print(f"  [PDF Extractor] {nome_pdf}: campos decididos após {len(resultados)} de {len(blocos)} bloco(s); "
+              f"restantes cancelados.")
+    return _montar_resultado(decididos)
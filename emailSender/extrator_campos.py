@@ -0,0 +1,89 @@
+# extrator_campos.py
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Um único padrão para todos os campos: o texto é percorrido uma só vez.
+# - Todo match começa por um dígito (vara) ou por "C" (comarca). Esse conjunto inicial explícito,
+#   sem re.IGNORECASE (as maiúsculas/minúsculas estão nas próprias classes), permite ao motor de
+#   regex pular rapidamente as posições que não podem iniciar um match.
+# - A captura da comarca fica limitada à mesma linha (sem \n) e a no máximo 80 caracteres.
+#   "Comarca", "de" e o nome podem estar separados por uma única quebra de linha (ex.: "COMARCA DE\nFRANCA").
+PADRAO_CAMPOS = re.compile(
+    r"[\dCc](?:"
+    r"(?<=\d)(?P<vara_civel>\d*ª\s*[Vv][Aa][Rr][Aa]\s*[Cc][ÍíIi][Vv][Ee][Ll])"
+    r"|(?<=[Cc])[Oo][Mm][Aa][Rr][Cc][Aa](?:[ \t]+|[ \t]*\r?\n[ \t]*)[Dd][Ee](?:[ \t]+|[ \t]*\r?\n[ \t]*)(?P<comarca>[A-Za-zÀ-ú'][A-Za-zÀ-ú' \t-]{0,79})"
+    r")"
+)
+
+# Palavras que indicam que a linha da comarca já passou para outro campo (ex.: "Comarca de Franca Foro de Franca")
+PADRAO_FIM_COMARCA = re.compile(r"[ \t-]+(?:Foro|Vara|Ju[íi]zo|Cart[óo]rio|Estado|Tribunal)\b.*$", re.IGNORECASE)
+PADRAO_ESPACOS = re.compile(r"\s+")
+
+CAMPOS = ("vara_civel", "comarca")
+
+
+class CamposExtraidos(NamedTuple):
+    """Campos encontrados no texto e as posições (início, fim) de cada captura no texto original."""
+    vara_civel: Optional[str] = None
+    comarca: Optional[str] = None
+    posicao_vara_civel: Optional[Tuple[int, int]] = None
+    posicao_comarca: Optional[Tuple[int, int]] = None
+
+    def como_dict(self) -> dict:
+        """Mesmo formato retornado por pdf_processor.extrair_informacoes_processo (só campos encontrados)."""
+        return {campo: getattr(self, campo) for campo in CAMPOS if getattr(self, campo)}
+
+
+def _limpar(valor: str) -> str:
+    return PADRAO_ESPACOS.sub(" ", valor).strip(" -")
+
+
+class ExtratorCampos:
+    """
+    Extrator pré-compilado de Vara Cível e Comarca.
+
+    Uma única passada (finditer) sobre o texto, que para assim que todos os campos
+    foram encontrados. Para cada campo vale a primeira ocorrência no documento.
+    """
+
+    def __init__(self, padrao=PADRAO_CAMPOS):
+        self.padrao = padrao
+
+    def extrair(self, texto: str) -> CamposExtraidos:
+        encontrados = {}
+        if not texto:
+            return CamposExtraidos()
+        for match in self.padrao.finditer(texto):
+            campo = match.lastgroup
+            if campo in encontrados:
+                continue
+            if campo == "vara_civel":
+                # O primeiro dígito da vara é o caractere inicial do match, fora do grupo
+                valor, posicao = match.group(0), match.span()
+            else:
+                valor, posicao = PADRAO_FIM_COMARCA.sub("", match.group(campo)), match.span(campo)
+            valor = _limpar(valor)
+            if not valor:
+                continue
+            encontrados[campo] = (valor, posicao)
+            if len(encontrados) == len(CAMPOS):
+                break
+        vara = encontrados.get("vara_civel", (None, None))
+        comarca = encontrados.get("comarca", (None, None))
+        return CamposExtraidos(vara[0], comarca[0], vara[1], comarca[1])
+
+    def extrair_lote(self, textos: Iterable[str]) -> List[CamposExtraidos]:
+        """Aplica o extrator a vários textos, na mesma ordem."""
+        return [self.extrair(texto) for texto in textos]
+
+
+# Instância padrão, compilada uma vez na importação do módulo
+EXTRATOR_PADRAO = ExtratorCampos()
+
+
+def extrair_campos(texto: str) -> CamposExtraidos:
+    return EXTRATOR_PADRAO.extrair(texto)
+
+
+def extrair_campos_lote(textos: Iterable[str]) -> List[CamposExtraidos]:
+    return EXTRATOR_PADRAO.extrair_lote(textos)
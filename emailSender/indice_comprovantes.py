@@ -0,0 +1,99 @@
+# indice_comprovantes.py
+import os
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+try:
+    import config
+except ImportError:
+    print("ERRO CRÍTICO em indice_comprovantes.py: O arquivo config.py não foi encontrado ou não pôde ser importado.")
+
+
+    class FallbackConfig:
+        PASTA_COMPROVANTES = "pasta_comprovantes_nao_configurada"
+
+
+    config = FallbackConfig()
+
+# Subpastas criadas pelo próprio sistema que não contêm comprovantes
+PASTAS_IGNORADAS = {"_temp_conversion"}
+
+
+class ArquivoComprovante(NamedTuple):
+    """Um arquivo de comprovante com os dados de stat obtidos durante a varredura."""
+    caminho: str
+    tamanho: int
+    mtime: float
+
+
+class IndiceComprovantes:
+    """
+    Índice em memória da pasta de comprovantes: numero_processo -> lista de arquivos.
+
+    A pasta base é listada uma única vez com os.scandir; só as subpastas dos processos
+    pedidos (os PDFs da fila) são varridas, reaproveitando os dados de stat que o DirEntry
+    já traz (no Windows/SMB eles vêm na própria listagem do diretório). Assim o custo por
+    execução acompanha a fila, e não o histórico de processos da pasta. Uma subpasta fora
+    da lista é varrida na primeira consulta.
+    """
+
+    def __init__(self, pasta_base: Optional[str] = None):
+        self.pasta_base = pasta_base or config.PASTA_COMPROVANTES
+        self._subpastas: Dict[str, os.DirEntry] = {}
+        self._arquivos_por_processo: Dict[str, List[ArquivoComprovante]] = {}
+        self.construido = False
+
+    def construir(self, numeros_processo: Optional[Iterable[str]] = None) -> int:
+        """
+        Lista a pasta de comprovantes e varre as subpastas de 'numeros_processo'
+        (todas, se None). Retorna o número de subpastas de processo indexadas.
+        """
+        inicio = time.perf_counter()
+        self._arquivos_por_processo = {}
+        self._subpastas = {entrada.name: entrada for entrada in self._listar_subpastas()}
+        nomes = self._subpastas.keys() if numeros_processo is None else \
+            [numero for numero in set(numeros_processo) if numero in self._subpastas]
+        for nome in nomes:
+            self._indexar_subpasta(self._subpastas[nome])
+        self.construido = True
+        print(
+            f"  [Indice Comprovantes] {len(self._arquivos_por_processo)} de {len(self._subpastas)} subpasta(s) de "
+            f"processo indexada(s) em {time.perf_counter() - inicio:.2f}s a partir de '{self.pasta_base}'.")
+        return len(self._arquivos_por_processo)
+
+    def obter(self, numero_processo: str) -> Optional[List[ArquivoComprovante]]:
+        """Retorna os arquivos do processo, ou None se a subpasta do processo não existe."""
+        arquivos = self._arquivos_por_processo.get(numero_processo)
+        if arquivos is None and numero_processo in self._subpastas:
+            self._indexar_subpasta(self._subpastas[numero_processo])
+            arquivos = self._arquivos_por_processo.get(numero_processo)
+        return list(arquivos) if arquivos is not None else None
+
+    def __contains__(self, numero_processo: str) -> bool:
+        return numero_processo in self._subpastas
+
+    def __len__(self) -> int:
+        return len(self._arquivos_por_processo)
+
+    def _listar_subpastas(self) -> List[os.DirEntry]:
+        try:
+            with os.scandir(self.pasta_base) as it:
+                return [e for e in it if e.name not in PASTAS_IGNORADAS and e.is_dir()]
+        except OSError as e:
+            print(f"  [Indice Comprovantes] Erro ao varrer a pasta de comprovantes '{self.pasta_base}': {e}")
+            return []
+
+    def _indexar_subpasta(self, entrada_subpasta: os.DirEntry):
+        arquivos = []
+        try:
+            with os.scandir(entrada_subpasta.path) as it:
+                for entrada in it:
+                    if entrada.name in PASTAS_IGNORADAS or not entrada.is_file():
+                        continue
+                    st = entrada.stat()
+                    arquivos.append(ArquivoComprovante(entrada.path, st.st_size, st.st_mtime))
+        except OSError as e:
+            print(f"  [Indice Comprovantes] Erro ao varrer a subpasta '{entrada_subpasta.name}': {e}")
+            return
+        arquivos.sort(key=lambda a: os.path.basename(a.caminho))
+        self._arquivos_por_processo[entrada_subpasta.name] = arquivos
@@ -0,0 +1,242 @@
+# isolamento_estagios.py
+import os
+import time
+import signal
+import pickle
+import multiprocessing
+from typing import Optional
+
+try:
+    import resource  # Só existe em sistemas POSIX
+except ImportError:
+    resource = None
+
+try:
+    import psutil  # Opcional: permite vigiar a memória do worker também no Windows
+except ImportError:
+    psutil = None
+
+import config
+
+# De quanto em quanto tempo o processo principal confere o worker enquanto espera o resultado
+INTERVALO_MONITORAMENTO_SEGUNDOS = 0.5
+# Tempo dado ao worker para sair pelo caminho normal (SIGTERM) antes do SIGKILL no grupo inteiro
+TEMPO_ENCERRAMENTO_GRACIOSO_SEGUNDOS = 2
+
+
+class EstagioInterrompido(Exception):
+    """Um estágio isolado estourou o tempo/memória ou o worker morreu; o worker já foi reiniciado."""
+
+    def __init__(self, estagio: str, motivo: str):
+        super().__init__(f"{estagio}: {motivo}")
+        self.estagio = estagio
+        self.motivo = motivo
+
+
+def _aplicar_limite_memoria(limite_memoria_mb: Optional[int]):
+    if not limite_memoria_mb or resource is None:
+        return
+    limite_bytes = limite_memoria_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limite_bytes, limite_bytes))
+    except (ValueError, OSError) as e:
+        print(f"  [Isolamento] Não foi possível aplicar o limite de memória de {limite_memoria_mb} MB: {e}")
+
+
+def _sair_por_sinal(*_):
+    # SystemExit sai pelo caminho normal: os finalizadores do multiprocessing ainda rodam, encerrando
+    # o pool persistente da extração paralela e liberando os seus semáforos
+    raise SystemExit(1)
+
+
+def _laco_worker(conexao, limite_memoria_mb: Optional[int]):
+    """Laço do processo worker: executa (função, args, kwargs) recebidos e devolve (status, valor)."""
+    if hasattr(os, "setsid"):
+        # Grupo de processos próprio: os subprocessos do estágio (ex.: o pool da extração paralela)
+        # ficam no grupo e morrem junto com o worker em _matar_arvore
+        try:
+            os.setsid()
+        except OSError:
+            pass
+        signal.signal(signal.SIGTERM, _sair_por_sinal)
+    _aplicar_limite_memoria(limite_memoria_mb)
+    while True:
+        try:
+            tarefa = conexao.recv()
+        except (EOFError, OSError):
+            return
+        if tarefa is None:
+            return
+        funcao, args, kwargs = tarefa
+        try:
+            resposta = ("ok", funcao(*args, **kwargs))
+        except MemoryError:
+            resposta = ("memoria", None)
+        except Exception as e:
+            resposta = ("erro", e)
+        try:
+            conexao.send(resposta)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Resultado/exceção não serializável: devolve só a descrição
+            conexao.send(("erro", RuntimeError(repr(resposta[1]))))
+
+
+class ExecutorIsolado:
+    """
+    Executa estágios pesados (pdfplumber, PyPDF2) num processo worker separado, com limite de
+    tempo de parede e de memória. Se o limite estoura, o worker é morto e um novo é criado na
+    próxima chamada; o chamador recebe EstagioInterrompido e segue para o próximo PDF.
+
+    O worker é reutilizado entre chamadas, então as importações pesadas são pagas uma vez só.
+    A memória é limitada com RLIMIT_AS no POSIX e, se o psutil estiver instalado, também
+    vigiada pelo processo principal (único meio no Windows), somando o worker e seus subprocessos.
+    Ao interromper um estágio, a árvore inteira é morta: o grupo de processos do worker no POSIX
+    e, com psutil, todos os descendentes (no Windows, sem psutil, só o próprio worker).
+    """
+
+    def __init__(self, limite_memoria_mb: Optional[int] = None):
+        if limite_memoria_mb is None:
+            limite_memoria_mb = getattr(config, "LIMITE_MEMORIA_ESTAGIO_MB", None)
+        self.limite_memoria_mb = limite_memoria_mb
+        if limite_memoria_mb and resource is None and psutil is None:
+            print(f"  [Isolamento] ATENÇÃO: sem RLIMIT_AS (Windows) e sem psutil, o limite de memória de "
+                  f"{limite_memoria_mb} MB NÃO será aplicado; só o limite de tempo vale. "
+                  f"Instale com: pip install psutil")
+        self._contexto = multiprocessing.get_context("spawn")
+        self._processo = None
+        self._conexao = None
+        self.reinicios = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def _garantir_worker(self):
+        if self._processo is not None and self._processo.is_alive():
+            return
+        self._descartar_worker()
+        conexao_pai, conexao_filho = self._contexto.Pipe()
+        # Não-daemon: o worker pode precisar criar seus próprios subprocessos
+        self._processo = self._contexto.Process(target=_laco_worker, args=(conexao_filho, self.limite_memoria_mb),
+                                                name="estagio-isolado")
+        self._processo.start()
+        conexao_filho.close()
+        self._conexao = conexao_pai
+
+    def _matar_arvore(self):
+        """
+        Mata o worker e os subprocessos que ele criou, para não deixá-los órfãos. No POSIX o worker
+        recebe antes um SIGTERM e alguns instantes para sair pelo caminho normal; depois, o que
+        restar do seu grupo de processos leva SIGKILL.
+        """
+        pid = self._processo.pid
+        descendentes = []
+        if psutil is not None:
+            try:
+                descendentes = psutil.Process(pid).children(recursive=True)
+            except psutil.Error:
+                pass
+        if hasattr(os, "killpg"):
+            try:
+                grupo_proprio = os.getpgid(pid) == pid  # o worker já virou líder do próprio grupo (os.setsid)
+            except OSError:
+                grupo_proprio = False
+            self._processo.terminate()
+            self._processo.join(TEMPO_ENCERRAMENTO_GRACIOSO_SEGUNDOS)
+            if grupo_proprio:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:
+                    pass  # grupo já vazio
+        if self._processo.is_alive():
+            self._processo.kill()
+        for processo in descendentes:
+            try:
+                processo.kill()
+            except psutil.Error:
+                pass
+
+    def _descartar_worker(self):
+        if self._processo is not None:
+            if self._processo.is_alive():
+                self._matar_arvore()
+            self._processo.join(5)
+            self._processo = None
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+
+    def _reiniciar(self):
+        self._descartar_worker()
+        self.reinicios += 1
+
+    def _memoria_worker_mb(self) -> Optional[float]:
+        """Memória residente do worker somada à de todos os seus descendentes."""
+        if psutil is None or self._processo is None:
+            return None
+        try:
+            worker = psutil.Process(self._processo.pid)
+            total = worker.memory_info().rss
+            for processo in worker.children(recursive=True):
+                try:
+                    total += processo.memory_info().rss
+                except psutil.Error:
+                    pass  # terminou durante a medição
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def executar(self, estagio: str, funcao, *args, tempo_limite: Optional[float] = None, **kwargs):
+        """
+        Executa funcao(*args, **kwargs) no worker e devolve seu resultado.
+        'funcao' precisa ser uma função de módulo (serializável por referência).
+        Exceções comuns da função são relançadas aqui; estouro de tempo/memória ou morte do
+        worker viram EstagioInterrompido.
+        """
+        self._garantir_worker()
+        self._conexao.send((funcao, args, kwargs))
+        inicio = time.monotonic()
+        while True:
+            espera = INTERVALO_MONITORAMENTO_SEGUNDOS
+            if tempo_limite:
+                espera = max(0.0, min(espera, tempo_limite - (time.monotonic() - inicio)))
+            if self._conexao.poll(espera):
+                try:
+                    status, valor = self._conexao.recv()
+                except (EOFError, OSError):
+                    self._processo.join(1)
+                    codigo_saida = self._processo.exitcode
+                    self._reiniciar()
+                    raise EstagioInterrompido(estagio, f"worker terminou inesperadamente (código {codigo_saida})")
+                if status == "ok":
+                    return valor
+                if status == "memoria":
+                    self._reiniciar()
+                    raise EstagioInterrompido(estagio, f"limite de memória de {self.limite_memoria_mb} MB excedido")
+                raise valor
+
+            if not self._processo.is_alive():
+                codigo_saida = self._processo.exitcode
+                self._reiniciar()
+                raise EstagioInterrompido(estagio, f"worker terminou inesperadamente (código {codigo_saida})")
+            decorrido = time.monotonic() - inicio
+            if tempo_limite and decorrido >= tempo_limite:
+                self._reiniciar()
+                raise EstagioInterrompido(estagio, f"tempo limite de {tempo_limite:g}s excedido")
+            memoria_mb = self._memoria_worker_mb()
+            if self.limite_memoria_mb and memoria_mb and memoria_mb > self.limite_memoria_mb:
+                self._reiniciar()
+                raise EstagioInterrompido(
+                    estagio, f"limite de memória de {self.limite_memoria_mb} MB excedido ({memoria_mb:.0f} MB em uso)")
+
+    def encerrar(self):
+        """Pede ao worker para sair e, se ele não sair logo, o mata."""
+        if self._processo is not None and self._processo.is_alive():
+            try:
+                self._conexao.send(None)
+            except (OSError, ValueError):
+                pass
+            self._processo.join(2)
+        self._descartar_worker()
@@ -2,12 +2,20 @@
 import os
 import time
 import shutil
+import argparse
 
 try:
     import config
     import pdf_processor
     import excel_reader
     import email_sender
+    import indice_comprovantes
+    import perfilador
+    import coordenacao_workers
+    import cnj
+    import isolamento_estagios
+    import agendador
+    import extracao_paralela
 except ImportError as e:
     print(f"ERRO CRÍTICO em main.py: Falha ao importar um dos módulos do projeto: {e}")
     print(
@@ -28,10 +36,13 @@ def carregar_pdfs_processados() -> set:
     return processados
 
 
-def marcar_como_processado_e_mover(nome_arquivo_pdf: str, sucesso_envio: bool):
+def marcar_como_processado_e_mover(nome_arquivo_pdf: str, sucesso_envio: bool, caminho_origem_pdf: str = None,
+                                   motivo_erro: str = None):
     """
     Adiciona o nome do arquivo PDF à lista de processados no log
     e move o arquivo para a pasta de sucesso ou erro.
+    'caminho_origem_pdf' é usado quando o PDF foi reivindicado para a pasta de um worker.
+    'motivo_erro', se informado, é gravado ao lado do PDF movido (<arquivo>.motivo.txt).
     """
     try:
         with open(config.ARQUIVO_PROCESSADOS_LOG, "a", encoding="utf-8") as f:
@@ -42,7 +53,8 @@ def marcar_como_processado_e_mover(nome_arquivo_pdf: str, sucesso_envio: bool):
     pasta_destino = config.PASTA_PROCESSADOS_SUCESSO if sucesso_envio else config.PASTA_PROCESSADOS_ERRO
     os.makedirs(pasta_destino, exist_ok=True)
 
-    caminho_origem_pdf = os.path.join(config.PASTA_PROCESSOS_PDF, nome_arquivo_pdf)
+    if not caminho_origem_pdf:
+        caminho_origem_pdf = os.path.join(config.PASTA_PROCESSOS_PDF, nome_arquivo_pdf)
     caminho_destino_pdf = os.path.join(pasta_destino, nome_arquivo_pdf)
 
     try:
@@ -61,13 +73,33 @@ def marcar_como_processado_e_mover(nome_arquivo_pdf: str, sucesso_envio: bool):
     except Exception as e:
         print(f"  Erro ao mover PDF {nome_arquivo_pdf} para {pasta_destino}: {e}")
 
+    if motivo_erro:
+        try:
+            with open(caminho_destino_pdf + ".motivo.txt", "w", encoding="utf-8") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {motivo_erro}\n")
+        except Exception as e:
+            print(f"  Erro ao gravar o motivo do erro de {nome_arquivo_pdf}: {e}")
+
 
-def processar_um_pdf(caminho_pdf: str, nome_pdf: str) -> bool:
+def processar_um_pdf(caminho_pdf: str, nome_pdf: str, indice=None, mapa_foros=None, resolvedor=None,
+                     executor=None, tempos=None, sessao_smtp=None) -> bool:
     """
     Processa um único arquivo PDF: extrai dados, busca email, monta e envia.
     O número do processo é obtido do nome do arquivo PDF.
     Os comprovantes são unificados em um único PDF.
+    'indice' é o IndiceComprovantes da execução (opcional; sem ele a pasta é lida do disco).
+    'mapa_foros' é o cnj.MapaForos da execução (opcional): se o foro do número CNJ já tem
+    vara/comarca conhecidas e a planilha mostra uma única Vara Cível na comarca, a extração de
+    texto do PDF é dispensada (exceto numa amostra, conferida lendo o texto).
+    'resolvedor' é o excel_reader.ResolvedorEmails da execução (opcional; sem ele a planilha é
+    lida a cada PDF por buscar_email_vara).
+    'executor' é o isolamento_estagios.ExecutorIsolado da execução (opcional): extração de texto e
+    unificação rodam nele, com limite de tempo/memória; um estouro levanta EstagioInterrompido.
+    'tempos', se informado, recebe a duração (s) de cada estágio executado: "extracao", "unificacao", "envio".
+    'sessao_smtp' é a email_sender.SessaoSMTP da execução (opcional; sem ela cada email abre sua própria conexão).
     """
+    if tempos is None:
+        tempos = {}
     print(f"\n>>> Iniciando processamento do PDF: {nome_pdf} <<<")
 
     numero_processo, _ = os.path.splitext(nome_pdf)
@@ -79,19 +111,75 @@ def processar_um_pdf(caminho_pdf: str, nome_pdf: str) -> bool:
             f"  [Main Process] Não foi possível obter um número de processo válido do nome do arquivo: {nome_pdf}. Pulando.")
         return False
 
-    texto_pdf = pdf_processor.extrair_texto_do_pdf(caminho_pdf)
-    if not texto_pdf:
-        print(f"Falha ao extrair texto do PDF {nome_pdf}. PDF não será processado.")
-        return False
-
-    dados_vara_comarca = pdf_processor.extrair_informacoes_processo(texto_pdf, nome_pdf)
-
     vara_civel = None
     comarca = None
+    resolvido_pelo_mapa = None
+    lido_do_pdf = False
+
+    numero_cnj = cnj.decodificar_cnj(numero_processo)
+    if numero_cnj:
+        print(f"  [Main Process] Número CNJ válido: {numero_cnj.formatado} (foro {numero_cnj.chave_origem})")
+        if mapa_foros:
+            resolvido_pelo_mapa = mapa_foros.resolver(numero_cnj)
+            # O foro não identifica a vara: só confia no mapa se a comarca tem uma única Vara Cível na planilha
+            if resolvido_pelo_mapa and not (resolvedor and resolvedor.comarca_tem_vara_unica(resolvido_pelo_mapa[1])):
+                print(f"  [Main Process] Foro {numero_cnj.chave_origem} conhecido, mas a comarca tem mais de uma Vara "
+                      f"Cível na planilha: o PDF será lido.")
+            elif resolvido_pelo_mapa and mapa_foros.deve_conferir():
+                print(f"  [Main Process] Vara/Comarca conhecidas pelo mapa de foros; PDF lido mesmo assim (conferência por amostragem).")
+            elif resolvido_pelo_mapa:
+                vara_civel, comarca = resolvido_pelo_mapa
+                print(f"  [Main Process] Vara/Comarca obtidas do mapa de foros, sem ler o PDF.")
+    else:
+        print(f"  [Main Process] '{numero_processo}' não é um número CNJ válido (dígito verificador não confere).")
+
+    if not (vara_civel and comarca):
+        inicio_estagio = time.perf_counter()
+        if getattr(config, "EXTRACAO_PARALELA_POR_PAGINAS", False):
+            # Vara/Comarca procuradas página a página (em paralelo nos PDFs longos), sem montar o texto inteiro
+            if executor:
+                campos_paginados = executor.executar("extração de texto", extracao_paralela.extrair_campos_do_pdf,
+                                                     caminho_pdf, tempo_limite=config.TEMPO_LIMITE_EXTRACAO_SEGUNDOS)
+            else:
+                campos_paginados = extracao_paralela.extrair_campos_do_pdf(caminho_pdf)
+            tempos["extracao"] = time.perf_counter() - inicio_estagio
+            if campos_paginados is None:
+                print(f"Falha ao extrair texto do PDF {nome_pdf}. PDF não será processado.")
+                return False
+            print(f"  [Main Process] Vara Cível na página {campos_paginados.pagina_vara_civel}, "
+                  f"Comarca na página {campos_paginados.pagina_comarca}.")
+            dados_vara_comarca = campos_paginados.como_dict()
+        else:
+            if executor:
+                texto_pdf = executor.executar("extração de texto", pdf_processor.extrair_texto_do_pdf, caminho_pdf,
+                                              tempo_limite=config.TEMPO_LIMITE_EXTRACAO_SEGUNDOS)
+            else:
+                texto_pdf = pdf_processor.extrair_texto_do_pdf(caminho_pdf)
+            tempos["extracao"] = time.perf_counter() - inicio_estagio
+            if not texto_pdf:
+                print(f"Falha ao extrair texto do PDF {nome_pdf}. PDF não será processado.")
+                return False
+
+            dados_vara_comarca = pdf_processor.extrair_informacoes_processo(texto_pdf, nome_pdf)
+
+        if dados_vara_comarca:
+            vara_civel = dados_vara_comarca.get("vara_civel")
+            comarca = dados_vara_comarca.get("comarca")
+            lido_do_pdf = bool(vara_civel and comarca)
+
+        if resolvido_pelo_mapa and lido_do_pdf and \
+                tuple(map(cnj.normalizar_valor, resolvido_pelo_mapa)) != (cnj.normalizar_valor(vara_civel),
+                                                                          cnj.normalizar_valor(comarca)):
+            print(
+                f"  [Main Process] ATENÇÃO: o PDF indica '{vara_civel}' / '{comarca}', mas o mapa de foros indicava "
+                f"'{resolvido_pelo_mapa[0]}' / '{resolvido_pelo_mapa[1]}'. Vale o texto do PDF.")
 
-    if dados_vara_comarca:
-        vara_civel = dados_vara_comarca.get("vara_civel")
-        comarca = dados_vara_comarca.get("comarca")
+        # Conferência cruzada com o foro do número CNJ
+        if numero_cnj and mapa_foros and comarca:
+            comarca_do_foro = mapa_foros.comarca_conhecida(numero_cnj)
+            if comarca_do_foro and cnj.normalizar_valor(comarca_do_foro) != cnj.normalizar_valor(comarca):
+                print(
+                    f"  [Main Process] ATENÇÃO: comarca extraída ('{comarca}') difere da comarca conhecida do foro {numero_cnj.chave_origem} ('{comarca_do_foro}').")
 
     print(f"  [Main Process] Vara Cível extraída: '{vara_civel}' (Tipo: {type(vara_civel).__name__})")
     print(f"  [Main Process] Comarca extraída: '{comarca}' (Tipo: {type(comarca).__name__})")
@@ -114,18 +202,26 @@ def processar_um_pdf(caminho_pdf: str, nome_pdf: str) -> bool:
 
     print(f"  Dados para busca no Excel -> Vara: '{vara_civel}', Comarca: '{comarca}'")
 
-    comprovantes_originais = pdf_processor.identificar_comprovantes(numero_processo)
+    comprovantes_originais = pdf_processor.identificar_comprovantes(numero_processo, indice)
 
     lista_final_de_anexos_para_email = []
 
     if comprovantes_originais:
         print(
             f"  [Main Process] {len(comprovantes_originais)} comprovante(s) original(is) encontrado(s). Tentando unificar em um único PDF.")
-        caminho_pdf_unificado = pdf_processor.criar_pdf_unificado(
-            comprovantes_originais,
-            numero_processo,
-            config.PASTA_COMPROVANTES
-        )
+        inicio_estagio = time.perf_counter()
+        if executor:
+            caminho_pdf_unificado = executor.executar(
+                "unificação de comprovantes", pdf_processor.criar_pdf_unificado,
+                comprovantes_originais, numero_processo, config.PASTA_COMPROVANTES,
+                tempo_limite=config.TEMPO_LIMITE_UNIFICACAO_SEGUNDOS)
+        else:
+            caminho_pdf_unificado = pdf_processor.criar_pdf_unificado(
+                comprovantes_originais,
+                numero_processo,
+                config.PASTA_COMPROVANTES
+            )
+        tempos["unificacao"] = time.perf_counter() - inicio_estagio
         if caminho_pdf_unificado and os.path.exists(caminho_pdf_unificado):
             lista_final_de_anexos_para_email.append(caminho_pdf_unificado)
             print(f"  [Main Process] PDF unificado pronto para anexo: {os.path.basename(caminho_pdf_unificado)}")
@@ -135,7 +231,10 @@ def processar_um_pdf(caminho_pdf: str, nome_pdf: str) -> bool:
     else:
         print("  [Main Process] Nenhum comprovante original encontrado para o processo.")
 
-    email_da_vara = excel_reader.buscar_email_vara(vara_civel, comarca)
+    if resolvedor:
+        email_da_vara = resolvedor.buscar(vara_civel, comarca)
+    else:
+        email_da_vara = excel_reader.buscar_email_vara(vara_civel, comarca)
     if not email_da_vara:
         print(
             f"Email da vara '{vara_civel}' na comarca '{comarca}' não encontrado para o PDF {nome_pdf}. Email não será enviado.")
@@ -158,13 +257,19 @@ def processar_um_pdf(caminho_pdf: str, nome_pdf: str) -> bool:
         print(
             f"  ALERTA DE TESTE: O email está configurado para ser enviado para o remetente ({config.EMAIL_REMETENTE}), mas o email da vara encontrado foi {email_da_vara}.")
 
+    inicio_estagio = time.perf_counter()
     sucesso_ao_enviar = email_sender.enviar_email(
         destinatario=email_destinatario_final,
         numero_processo=numero_processo,
-        caminhos_anexos=lista_final_de_anexos_para_email
+        caminhos_anexos=lista_final_de_anexos_para_email,
+        sessao=sessao_smtp
     )
+    tempos["envio"] = time.perf_counter() - inicio_estagio
 
     if sucesso_ao_enviar:
+        # Só aprende com valores lidos do PDF: valores vindos do próprio mapa não são evidência nova
+        if numero_cnj and mapa_foros and lido_do_pdf:
+            mapa_foros.registrar(numero_cnj, vara_civel, comarca)
         print(f"Processamento do PDF {nome_pdf} concluído com sucesso (email enviado).")
         return True
     else:
@@ -172,8 +277,17 @@ def processar_um_pdf(caminho_pdf: str, nome_pdf: str) -> bool:
         return False
 
 
-def executar_uma_vez():  # Nome da função alterado para refletir a nova funcionalidade
-    """Função principal para verificar a pasta de PDFs e processá-los UMA VEZ."""
+def executar_uma_vez(perfil=None, coordenador=None):  # Nome da função alterado para refletir a nova funcionalidade
+    """
+    Função principal para verificar a pasta de PDFs e processá-los UMA VEZ.
+    'perfil' é um perfilador.PerfiladorPDF opcional (modo --profile).
+    'coordenador' é um coordenacao_workers.CoordenadorWorkers opcional (modo --multi-worker):
+    cada PDF é reivindicado antes de ser processado, permitindo vários workers na mesma pasta.
+    Com config.ISOLAR_ESTAGIOS_PESADOS, os estágios pesados rodam num worker isolado com limite de
+    tempo/memória: um PDF patológico é interrompido e vai para ProcessadosComErro sem travar os demais.
+    A ordem de processamento é definida pelo agendador.Agendador (prazo, prioridade com envelhecimento,
+    menor custo esperado, chegada), e não pela ordem arbitrária do os.listdir.
+    """
     print("====================================================")
     print("Iniciando Sistema de Envio de Emails Automatizado (Execução Única)")  # Mensagem ajustada
     print(f"Data e Hora Início: {time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -194,8 +308,21 @@ def executar_uma_vez():  # Nome da função alterado para refletir a nova funcio
     pdfs_ja_processados_nesta_sessao = carregar_pdfs_processados()
     print(f"Carregados {len(pdfs_ja_processados_nesta_sessao)} PDFs do log de já processados.")
 
+    # Mapa foro (código de origem CNJ) -> vara/comarca aprendido em execuções anteriores
+    mapa_foros = cnj.MapaForos(config.ARQUIVO_MAPA_FOROS)
+    mapa_foros.carregar()
+
+    # Planilha lida uma vez; os pares (vara, comarca) são resolvidos em lote, cada par distinto uma só vez
+    resolvedor = excel_reader.ResolvedorEmails()
+    resolvedor.resolver_lote(mapa_foros.pares_conhecidos())
+
     # --- INÍCIO DA LÓGICA QUE ESTAVA DENTRO DO 'while True:' ---
     # Agora executa apenas uma vez
+    if coordenador:
+        # Antes da listagem: os PDFs que este worker deixou reivindicados e os de leases expirados
+        # voltam à pasta a tempo de entrar na fila desta execução
+        coordenador.iniciar()
+
     print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] Verificando por novos PDFs...")
     novos_pdfs_foram_detectados = False
     arquivos_na_pasta_monitorada = []
@@ -204,28 +331,98 @@ def executar_uma_vez():  # Nome da função alterado para refletir a nova funcio
             print(
                 f"ERRO CRÍTICO: A pasta de processos PDF '{config.PASTA_PROCESSOS_PDF}' não existe ou não é um diretório.")
             # Em execução única, podemos simplesmente sair se a pasta não existir.
+            if coordenador:
+                coordenador.encerrar()
             return
 
         arquivos_na_pasta_monitorada = os.listdir(config.PASTA_PROCESSOS_PDF)
     except Exception as e_listdir:
         print(f"ERRO ao listar arquivos em '{config.PASTA_PROCESSOS_PDF}': {e_listdir}")
+        if coordenador:
+            coordenador.encerrar()
         return  # Sai se não conseguir listar arquivos
 
-    for nome_do_arquivo in arquivos_na_pasta_monitorada:
-        caminho_completo_do_pdf = os.path.join(config.PASTA_PROCESSOS_PDF, nome_do_arquivo)
-
-        if nome_do_arquivo.lower().endswith(".pdf") and \
-                os.path.isfile(caminho_completo_do_pdf) and \
-                nome_do_arquivo not in pdfs_ja_processados_nesta_sessao:
-            novos_pdfs_foram_detectados = True
-            envio_bem_sucedido = processar_um_pdf(caminho_completo_do_pdf, nome_do_arquivo)
+    pdfs_novos = [nome for nome in arquivos_na_pasta_monitorada
+                  if nome.lower().endswith(".pdf") and
+                  os.path.isfile(os.path.join(config.PASTA_PROCESSOS_PDF, nome)) and
+                  nome not in pdfs_ja_processados_nesta_sessao]
+
+    # Índice da pasta de comprovantes: uma listagem da pasta base e só as subpastas dos PDFs da fila
+    indice = indice_comprovantes.IndiceComprovantes(config.PASTA_COMPROVANTES)
+    indice.construir(os.path.splitext(nome)[0] for nome in pdfs_novos)
+
+    historico_estagios = agendador.HistoricoEstagios()
+    historico_estagios.carregar()
+    fila = agendador.Agendador(config.PASTA_PROCESSOS_PDF, indice=indice, historico=historico_estagios)
+    # Marcadores de prioridade/prazo detectados na mesma listagem, sem consultas extras ao disco por PDF
+    fila.adicionar(pdfs_novos, marcadores=agendador.marcadores_na_listagem(arquivos_na_pasta_monitorada))
+    if len(fila):
+        ordem = fila.ordem_atual()
+        print(f"Fila com {len(ordem)} PDF(s). Primeiros: {', '.join(tarefa.nome for tarefa in ordem[:5])}")
+
+    executor = None
+    if getattr(config, "ISOLAR_ESTAGIOS_PESADOS", False):
+        executor = isolamento_estagios.ExecutorIsolado()
+    # Uma sessão SMTP autenticada para todos os emails da execução (aberta no primeiro envio)
+    sessao_smtp = email_sender.SessaoSMTP()
 
-            marcar_como_processado_e_mover(nome_do_arquivo, sucesso_envio=envio_bem_sucedido)
-            pdfs_ja_processados_nesta_sessao.add(
-                nome_do_arquivo)  # Adiciona mesmo se falhar, para não tentar de novo nesta execução
+    try:
+        while True:
+            tarefa = fila.proximo()
+            if not tarefa:
+                break
+            nome_do_arquivo = tarefa.nome
+            caminho_completo_do_pdf = tarefa.caminho
+
+            if nome_do_arquivo not in pdfs_ja_processados_nesta_sessao:
+                if coordenador:
+                    # Rename atômico para a pasta do worker: se outro worker já pegou o PDF, pula
+                    caminho_completo_do_pdf = coordenador.reivindicar(nome_do_arquivo)
+                    if not caminho_completo_do_pdf:
+                        continue
+                novos_pdfs_foram_detectados = True
+                motivo_erro = None
+                inicio_pdf = time.time()
+                tempos_estagios = {}
+                try:
+                    if perfil and perfil.deve_perfilar():
+                        # O cProfile só enxerga este processo: só os PDFs da amostra rodam sem isolamento,
+                        # para extração e unificação aparecerem no perfil; os demais seguem com os limites
+                        with perfil.perfilar(nome_do_arquivo, amostrado=True):
+                            envio_bem_sucedido = processar_um_pdf(caminho_completo_do_pdf, nome_do_arquivo, indice,
+                                                                  mapa_foros, resolvedor, None, tempos_estagios,
+                                                                  sessao_smtp)
+                    else:
+                        envio_bem_sucedido = processar_um_pdf(caminho_completo_do_pdf, nome_do_arquivo, indice,
+                                                              mapa_foros, resolvedor, executor, tempos_estagios,
+                                                              sessao_smtp)
+                except isolamento_estagios.EstagioInterrompido as e_estagio:
+                    print(f"  [Main Process] Estágio interrompido para {nome_do_arquivo} ({e_estagio}). "
+                          f"Worker reiniciado; o PDF vai para a pasta de erro.")
+                    envio_bem_sucedido = False
+                    motivo_erro = f"Estágio interrompido por limite - {e_estagio}"
+
+                fila.registrar(tarefa, inicio_pdf, tempos_estagios, envio_bem_sucedido)
+                marcar_como_processado_e_mover(nome_do_arquivo, sucesso_envio=envio_bem_sucedido,
+                                               caminho_origem_pdf=caminho_completo_do_pdf, motivo_erro=motivo_erro)
+                fila.descartar_marcadores(tarefa)
+                pdfs_ja_processados_nesta_sessao.add(
+                    nome_do_arquivo)  # Adiciona mesmo se falhar, para não tentar de novo nesta execução
+    finally:
+        mapa_foros.salvar()
+        historico_estagios.salvar()
+        sessao_smtp.encerrar()
+        if executor:
+            executor.encerrar()
+        extracao_paralela.encerrar_pool()  # pool deste processo (extração sem isolamento ou perfilada)
+        if coordenador:
+            coordenador.encerrar()
 
     if not novos_pdfs_foram_detectados:
         print("Nenhum novo PDF encontrado para processamento nesta execução.")
+
+    if perfil:
+        perfil.finalizar()
     # --- FIM DA LÓGICA QUE ESTAVA DENTRO DO 'while True:' ---
 
     print("\n----------------------------------------------------")
@@ -234,9 +431,53 @@ def executar_uma_vez():  # Nome da função alterado para refletir a nova funcio
     print("====================================================")
 
 
+def ler_argumentos():
+    """Lê as opções de linha de comando."""
+    parser = argparse.ArgumentParser(description="Sistema de Envio de Emails Automatizado (Execução Única)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfila cada PDF com cProfile e grava .prof + resumo .txt por PDF e um perfil mesclado.")
+    parser.add_argument("--profile-every", type=int, default=1, metavar="N",
+                        help="Perfila apenas 1 a cada N PDFs (padrão: 1, todos).")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Inclui também o rastreamento de memória com tracemalloc (mais custoso).")
+    parser.add_argument("--profile-top", type=int, default=30, metavar="N",
+                        help="Quantidade de funções/linhas nos resumos de texto (padrão: 30).")
+    parser.add_argument("--profile-dir", default=config.PASTA_PERFIS,
+                        help=f"Pasta de saída dos perfis (padrão: {config.PASTA_PERFIS}).")
+    parser.add_argument("--multi-worker", action="store_true",
+                        help="Reivindica cada PDF antes de processá-lo, permitindo vários workers/máquinas na mesma pasta.")
+    parser.add_argument("--worker-id", default=None,
+                        help="Identificador estável do worker (padrão: host-PID). Com um id fixo, um worker reiniciado "
+                             "recupera imediatamente os PDFs que deixou reivindicados.")
+    parser.add_argument("--partition", default=None, metavar="I/N",
+                        help="Processa apenas a partição I de N (por hash do nome do arquivo), ex.: 1/4.")
+    return parser.parse_args()
+
+
+def criar_coordenador(args):
+    """Monta o CoordenadorWorkers a partir das opções --multi-worker/--worker-id/--partition."""
+    if not (args.multi_worker or args.worker_id or args.partition):
+        return None
+    particao, total_particoes = 0, 1
+    if args.partition:
+        try:
+            indice_str, total_str = args.partition.split("/")
+            particao, total_particoes = int(indice_str) - 1, int(total_str)
+        except ValueError:
+            raise ValueError(f"Valor inválido para --partition: '{args.partition}'. Use o formato I/N, ex.: 1/4.")
+    return coordenacao_workers.CoordenadorWorkers(args.worker_id, particao=particao, total_particoes=total_particoes)
+
+
 if __name__ == "__main__":
+    args = ler_argumentos()
     try:
-        executar_uma_vez()  # Chama a função de execução única
+        perfil = None
+        if args.profile:
+            perfil = perfilador.PerfiladorPDF(args.profile_dir, amostragem=args.profile_every,
+                                             top_n=args.profile_top, memoria=args.profile_memory)
+            print(f"Modo de perfilamento ATIVO: 1 a cada {perfil.amostragem} PDF(s), saída em {perfil.pasta_execucao}")
+        coordenador = criar_coordenador(args)
+        executar_uma_vez(perfil, coordenador)  # Chama a função de execução única
     except Exception as e_global:
         print("\n----------------------------------------------------")
         print(f"UM ERRO GLOBAL INESPERADO OCORREU NO SCRIPT: {e_global}")
@@ -0,0 +1,278 @@
+# otimizador_pdf.py
+import io
+import re
+from typing import Dict, NamedTuple, Optional, Set
+
+try:
+    import PyPDF2
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, StreamObject
+except ImportError:
+    print("ERRO: A biblioteca 'PyPDF2' não está instalada. Por favor, instale com: pip install PyPDF2")
+    PyPDF2 = None
+
+# O otimizador manipula estruturas internas do PdfWriter (_objects, _root, _info, _pages, mapas de ids),
+# que mudam entre versões do PyPDF2: ele só roda na série validada; fora dela o PDF é gravado sem otimizar
+VERSAO_PYPDF2_SUPORTADA = "3.0."
+DISPONIVEL = PyPDF2 is not None and PyPDF2.__version__.startswith(VERSAO_PYPDF2_SUPORTADA)
+if PyPDF2 is not None and not DISPONIVEL:
+    print(f"ATENÇÃO: otimizador_pdf validado só com PyPDF2 {VERSAO_PYPDF2_SUPORTADA}x (instalado: {PyPDF2.__version__}). "
+          f"Os PDFs unificados serão gravados sem otimização. Para otimizar, instale com: pip install PyPDF2==3.0.1")
+
+# Categorias de /Resources podadas quando o nome não aparece no conteúdo da página
+CATEGORIAS_RECURSOS_PODAVEIS = ("/Font", "/XObject")
+PADRAO_NOME_PDF = re.compile(rb"/([^\s/\[\]()<>{}%]*)")
+PADRAO_ESCAPE_NOME_PDF = re.compile(rb"#([0-9A-Fa-f]{2})")
+
+# Tipos de objeto que nunca são mesclados: páginas idênticas precisam continuar sendo objetos distintos
+TIPOS_NAO_MESCLAVEIS = {"/Page", "/Pages", "/Catalog"}
+
+# Limite de passadas de deduplicação (cada passada pode revelar novos pais idênticos)
+MAX_PASSADAS_DEDUPLICACAO = 10
+
+
+class ResultadoOtimizacao(NamedTuple):
+    tamanho_antes: int  # informado pelo chamador (ex.: soma dos PDFs de origem); 0 se desconhecido
+    tamanho_depois: int
+    objetos_antes: int
+    objetos_depois: int
+    streams_comprimidos: int
+    objetos_duplicados: int
+    objetos_orfaos: int
+    recursos_podados: int
+
+    @property
+    def reducao_percentual(self) -> float:
+        if not self.tamanho_antes:
+            return 0.0
+        return 100.0 * (self.tamanho_antes - self.tamanho_depois) / self.tamanho_antes
+
+
+def _resolver_referencias(writer):
+    """
+    Copia para o writer os objetos dos PDFs de origem ainda referenciados indiretamente
+    (o que o PdfWriter faz no início de write()), sem serializar o documento.
+    """
+    if not writer._root:
+        writer._root = writer._add_object(writer._root_object)
+    writer._sweep_indirect_references(writer._root)
+
+
+def _filhos(obj):
+    if isinstance(obj, DictionaryObject):
+        return obj.items()
+    if isinstance(obj, ArrayObject):
+        return enumerate(obj)
+    return ()
+
+
+def _substituir_referencias(obj, novo_idnum: Dict[int, int], writer):
+    """Reescreve, recursivamente, as referências indiretas de obj segundo o mapa idnum antigo -> novo."""
+    pilha = [obj]
+    while pilha:
+        atual = pilha.pop()
+        for chave, valor in list(_filhos(atual)):
+            if isinstance(valor, IndirectObject):
+                if valor.pdf is writer and valor.idnum in novo_idnum:
+                    atual[chave] = IndirectObject(novo_idnum[valor.idnum], 0, writer)
+            elif isinstance(valor, (DictionaryObject, ArrayObject)):
+                pilha.append(valor)
+
+
+def _nomes_no_conteudo(pagina) -> Set[str]:
+    """Todos os nomes (/F1, /Im0, ...) que aparecem nos streams de conteúdo da página."""
+    conteudo = pagina.get("/Contents")
+    if conteudo is None:
+        return set()
+    conteudo = conteudo.get_object()
+    streams = [item.get_object() for item in conteudo] if isinstance(conteudo, ArrayObject) else [conteudo]
+    nomes = set()
+    for stream in streams:
+        for nome in PADRAO_NOME_PDF.findall(stream.get_data()):
+            nome = PADRAO_ESCAPE_NOME_PDF.sub(lambda m: bytes([int(m.group(1), 16)]), nome)
+            nomes.add("/" + nome.decode("utf-8", "replace"))
+    return nomes
+
+
+def _podar_recursos(writer) -> int:
+    """
+    Remove de /Font e /XObject dos /Resources das páginas as entradas cujo nome não aparece em
+    nenhum stream de conteúdo das páginas que usam aquele dicionário (que pode ser compartilhado).
+    Os objetos que ficarem sem referência são descartados depois, em _compactar. Páginas com
+    conteúdo ilegível mantêm todos os seus recursos.
+    """
+    usos: Dict[int, tuple] = {}  # id do dicionário de categoria -> (dicionário, nomes usados ou None)
+    for pagina in writer.pages:
+        recursos = pagina.get("/Resources")
+        if recursos is None:
+            continue
+        recursos = recursos.get_object()
+        try:
+            nomes = _nomes_no_conteudo(pagina)
+        except Exception:
+            nomes = None
+        for categoria in CATEGORIAS_RECURSOS_PODAVEIS:
+            dicionario = recursos.get(categoria)
+            if dicionario is None:
+                continue
+            dicionario = dicionario.get_object()
+            _, usados = usos.get(id(dicionario), (dicionario, set()))
+            usos[id(dicionario)] = (dicionario, None if usados is None or nomes is None else usados | nomes)
+
+    podados = 0
+    for dicionario, usados in usos.values():
+        if usados is None:
+            continue
+        for nome in [nome for nome in dicionario if nome not in usados]:
+            del dicionario[nome]
+            podados += 1
+    return podados
+
+
+def _validar_pdf_gravado(caminho: str, paginas_esperadas: int):
+    """
+    Relê o PDF gravado e levanta ValueError se ele estiver quebrado: número de páginas diferente,
+    referência indireta para objeto inexistente ou stream de conteúdo que não decodifica.
+    """
+    leitor = PyPDF2.PdfReader(caminho, strict=True)
+    if len(leitor.pages) != paginas_esperadas:
+        raise ValueError(f"PDF otimizado tem {len(leitor.pages)} página(s), esperadas {paginas_esperadas}.")
+    vistos = set()
+    pilha = [leitor.trailer]
+    while pilha:
+        atual = pilha.pop()
+        for _, valor in _filhos(atual):
+            if isinstance(valor, IndirectObject):
+                if valor.idnum in vistos:
+                    continue
+                vistos.add(valor.idnum)
+                alvo = valor.get_object()
+                if alvo is None or isinstance(alvo, NullObject):
+                    raise ValueError(f"PDF otimizado tem referência para o objeto inexistente {valor.idnum}.")
+                pilha.append(alvo)
+            elif isinstance(valor, (DictionaryObject, ArrayObject)):
+                pilha.append(valor)
+    for pagina in leitor.pages:
+        _nomes_no_conteudo(pagina)
+
+
+def _comprimir_streams(writer) -> int:
+    """Aplica FlateDecode a todo stream ainda sem filtro (conteúdo de páginas, imagens cruas, fontes)."""
+    comprimidos = 0
+    for i, obj in enumerate(writer._objects):
+        if not isinstance(obj, StreamObject) or "/Filter" in obj:
+            continue
+        novo = obj.flate_encode()
+        # flate_encode só copia o /Filter: o restante do dicionário (ex.: /Subtype /Image, /Width) é copiado aqui
+        for chave, valor in obj.items():
+            if chave not in ("/Filter", "/Length"):
+                novo[NameObject(chave)] = valor
+        if len(novo._data) < len(obj._data):
+            novo.indirect_reference = IndirectObject(i + 1, 0, writer)
+            writer._objects[i] = novo
+            comprimidos += 1
+    return comprimidos
+
+
+def _chave_conteudo(obj) -> Optional[bytes]:
+    if obj is None:
+        return None
+    if isinstance(obj, DictionaryObject) and obj.get("/Type") in TIPOS_NAO_MESCLAVEIS:
+        return None
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _deduplicar(writer) -> int:
+    """Mescla objetos com serialização idêntica (fontes, logos, imagens repetidas entre comprovantes)."""
+    descartados = set()
+    for _ in range(MAX_PASSADAS_DEDUPLICACAO):
+        vistos: Dict[bytes, int] = {}
+        substituicoes: Dict[int, int] = {}
+        for i, obj in enumerate(writer._objects):
+            if i + 1 in descartados:
+                continue
+            chave = _chave_conteudo(obj)
+            if chave is None:
+                continue
+            if chave in vistos:
+                substituicoes[i + 1] = vistos[chave]
+            else:
+                vistos[chave] = i + 1
+        if not substituicoes:
+            break
+        for obj in writer._objects:
+            if obj is not None:
+                _substituir_referencias(obj, substituicoes, writer)
+        # Os duplicados ficam órfãos e são descartados na compactação
+        descartados.update(substituicoes)
+    return len(descartados)
+
+
+def _compactar(writer) -> int:
+    """Remove os objetos inalcançáveis a partir do catálogo/info e renumera os restantes."""
+    raizes = [writer._root.idnum, writer._info.idnum]
+    alcancaveis = set()
+    pilha = list(raizes)
+    while pilha:
+        idnum = pilha.pop()
+        if idnum in alcancaveis or not 0 < idnum <= len(writer._objects):
+            continue
+        alcancaveis.add(idnum)
+        subpilha = [writer._objects[idnum - 1]]
+        while subpilha:
+            atual = subpilha.pop()
+            for _, valor in _filhos(atual):
+                if isinstance(valor, IndirectObject):
+                    if valor.pdf is writer:
+                        pilha.append(valor.idnum)
+                elif isinstance(valor, (DictionaryObject, ArrayObject)):
+                    subpilha.append(valor)
+
+    mantidos = sorted(alcancaveis)
+    removidos = len(writer._objects) - len(mantidos)
+    if not removidos:
+        return 0
+    novo_idnum = {antigo: novo for novo, antigo in enumerate(mantidos, start=1)}
+    novos_objetos = []
+    for antigo in mantidos:
+        obj = writer._objects[antigo - 1]
+        _substituir_referencias(obj, novo_idnum, writer)
+        obj.indirect_reference = IndirectObject(novo_idnum[antigo], 0, writer)
+        novos_objetos.append(obj)
+    writer._objects = novos_objetos
+    writer._root = IndirectObject(novo_idnum[writer._root.idnum], 0, writer)
+    writer._info = IndirectObject(novo_idnum[writer._info.idnum], 0, writer)
+    writer._pages = IndirectObject(novo_idnum[writer._pages.idnum], 0, writer)
+    # Os mapas de tradução de ids apontam para a numeração antiga: não adicione páginas depois da otimização
+    writer._idnum_hash = {}
+    writer._id_translated = {}
+    return removidos
+
+
+def gravar_pdf_otimizado(writer, caminho_saida: str, tamanho_antes: int = 0) -> ResultadoOtimizacao:
+    """
+    Otimiza um PdfWriter já montado e o grava em caminho_saida:
+    poda dos /Resources as fontes e imagens que o conteúdo das páginas não usa, comprime
+    streams sem filtro, deduplica objetos idênticos e descarta objetos órfãos (os recursos
+    podados e as cópias deduplicadas). O arquivo gravado é relido e conferido; se estiver
+    quebrado, levanta ValueError (o chamador grava então sem otimização).
+
+    Só deve ser chamado com DISPONIVEL verdadeiro. O documento é serializado uma única vez, já
+    otimizado; 'tamanho_antes' serve só para o relatório. Depois desta chamada o writer não deve
+    receber novas páginas.
+    """
+    _resolver_referencias(writer)
+    objetos_antes = len(writer._objects)
+    paginas = len(writer.pages)
+    recursos_podados = _podar_recursos(writer)
+    streams_comprimidos = _comprimir_streams(writer)
+    objetos_duplicados = _deduplicar(writer)
+    objetos_removidos = _compactar(writer)
+    with open(caminho_saida, "wb") as f_out:
+        writer.write(f_out)
+        tamanho_depois = f_out.tell()
+    _validar_pdf_gravado(caminho_saida, paginas)
+    return ResultadoOtimizacao(
+        tamanho_antes, tamanho_depois, objetos_antes, len(writer._objects),
+        streams_comprimidos, objetos_duplicados, max(0, objetos_removidos - objetos_duplicados), recursos_podados)
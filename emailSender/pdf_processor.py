@@ -1,9 +1,12 @@
 # pdf_processor.py
+import io
 import os
-import re
 from typing import Dict, Optional, List
 import shutil
 
+import extrator_campos
+import otimizador_pdf
+
 # Importações para unificação e conversão de PDF
 try:
     import PyPDF2  # Para unir PDFs
@@ -77,26 +80,19 @@ def extrair_informacoes_processo(texto_pdf: str, nome_arquivo_pdf_original: str)
             f"  [PDF Extractor] Texto do PDF está vazio para {nome_arquivo_pdf_original}. Não é possível extrair Vara/Comarca.")
         return None
 
-    dados_pdf = {}
     print(f"--- Analisando conteúdo do PDF: {nome_arquivo_pdf_original} para Vara e Comarca ---")
 
-    padrao_vara = r"(\d+ª\s*vara\s*c[íi]vel)"
-    match_vara = re.search(padrao_vara, texto_pdf, re.IGNORECASE)
-    if match_vara:
-        vara_capturada = match_vara.group(1).strip()
-        vara_limpa = vara_capturada.replace("\n", " ").replace("\r", " ")
-        dados_pdf["vara_civel"] = re.sub(r'\s+', ' ', vara_limpa).strip()
-        print(f"  [PDF Extractor] Vara Cível encontrada (após limpeza): {dados_pdf['vara_civel']}")
+    # Extrator pré-compilado: uma única passada no texto para os dois campos
+    campos = extrator_campos.extrair_campos(texto_pdf)
+    dados_pdf = campos.como_dict()
+
+    if campos.vara_civel:
+        print(f"  [PDF Extractor] Vara Cível encontrada (após limpeza): {campos.vara_civel} (posição {campos.posicao_vara_civel})")
     else:
         print(f"  [PDF Extractor] Vara cível não encontrada com o padrão atual no PDF: {nome_arquivo_pdf_original}.")
 
-    padrao_comarca = r"Comarca\s+de\s+([A-Za-zÀ-ú\s-]+(?:SP)?)"
-    match_comarca = re.search(padrao_comarca, texto_pdf, re.IGNORECASE)
-    if match_comarca:
-        comarca_capturada = match_comarca.group(1).strip()
-        comarca_limpa = comarca_capturada.replace("\n", " ").replace("\r", " ")
-        dados_pdf["comarca"] = re.sub(r'\s+', ' ', comarca_limpa).strip()
-        print(f"  [PDF Extractor] Comarca encontrada (após limpeza): {dados_pdf['comarca']}")
+    if campos.comarca:
+        print(f"  [PDF Extractor] Comarca encontrada (após limpeza): {campos.comarca} (posição {campos.posicao_comarca})")
     else:
         print(f"  [PDF Extractor] Comarca não encontrada com o padrão atual no PDF: {nome_arquivo_pdf_original}.")
 
@@ -108,9 +104,11 @@ def extrair_informacoes_processo(texto_pdf: str, nome_arquivo_pdf_original: str)
         return None
 
 
-def identificar_comprovantes(numero_processo: str) -> List[str]:
+def identificar_comprovantes(numero_processo: str, indice=None) -> List[str]:
     """
     Identifica os arquivos de comprovante na subpasta nomeada com o numero_processo.
+    Se um IndiceComprovantes (indice_comprovantes.py) for fornecido, a consulta é feita
+    no índice em memória, sem acessar o disco.
     """
     comprovantes_encontrados = []
     if not numero_processo:
@@ -122,6 +120,23 @@ def identificar_comprovantes(numero_processo: str) -> List[str]:
     caminho_subpasta_comprovantes = os.path.join(config.PASTA_COMPROVANTES, numero_processo)
     print(f"  [Attachment Finder] Procurando comprovantes na subpasta: {caminho_subpasta_comprovantes}")
 
+    if indice is not None:
+        arquivos_indexados = indice.obter(numero_processo)
+        if arquivos_indexados is None:
+            print(
+                f"  [Attachment Finder] Subpasta de comprovantes '{numero_processo}' não encontrada no índice de '{config.PASTA_COMPROVANTES}'.")
+            return []
+        for arquivo in arquivos_indexados:
+            comprovantes_encontrados.append(arquivo.caminho)
+            print(f"    -> Comprovante encontrado na subpasta: {os.path.basename(arquivo.caminho)} ({arquivo.tamanho} bytes)")
+        if not comprovantes_encontrados:
+            print(
+                f"  [Attachment Finder] Nenhum arquivo (comprovante) encontrado dentro da subpasta '{numero_processo}'.")
+        else:
+            print(
+                f"  [Attachment Finder] Total de {len(comprovantes_encontrados)} comprovante(s) encontrado(s) na subpasta (via índice).")
+        return comprovantes_encontrados
+
     if not os.path.isdir(caminho_subpasta_comprovantes):
         print(
             f"  [Attachment Finder] Subpasta de comprovantes '{os.path.basename(caminho_subpasta_comprovantes)}' não encontrada em '{config.PASTA_COMPROVANTES}'.")
@@ -263,6 +278,23 @@ def criar_pdf_de_imagem(caminho_arquivo_imagem: str, caminho_pdf_saida: str):
         return False
 
 
+def _unir_paginas(pdfs_para_unir: List[str], detalhar: bool = True):
+    """Monta um PdfWriter com as páginas de todos os PDFs da lista; PDFs ilegíveis são ignorados."""
+    merger = PyPDF2.PdfWriter()
+    for pdf_path in pdfs_para_unir:
+        try:
+            reader = PyPDF2.PdfReader(pdf_path)
+            for page in reader.pages:
+                merger.add_page(page)
+            if detalhar:
+                print(f"      -> Páginas de '{os.path.basename(pdf_path)}' adicionadas ao PDF final.")
+        except Exception as e_read:
+            if detalhar:
+                print(
+                    f"  [PDF Unifier] Erro ao ler o PDF '{os.path.basename(pdf_path)}' durante a união: {e_read}. Será ignorado.")
+    return merger
+
+
 def criar_pdf_unificado(lista_arquivos_originais: List[str], numero_processo: str, pasta_base_comprovantes: str) -> \
 Optional[str]:
     """
@@ -315,20 +347,28 @@ Optional[str]:
     caminho_pdf_final = os.path.join(pasta_processo_especifico, nome_pdf_final)
 
     try:
-        merger = PyPDF2.PdfWriter()
-        for pdf_path in pdfs_para_unir:
-            try:
-                reader = PyPDF2.PdfReader(pdf_path)
-                for page in reader.pages:
-                    merger.add_page(page)
-                print(f"      -> Páginas de '{os.path.basename(pdf_path)}' adicionadas ao PDF final.")
-            except Exception as e_read:
-                print(
-                    f"  [PDF Unifier] Erro ao ler o PDF '{os.path.basename(pdf_path)}' durante a união: {e_read}. Será ignorado.")
+        merger = _unir_paginas(pdfs_para_unir)
 
         if len(merger.pages) > 0:
-            with open(caminho_pdf_final, "wb") as f_out:
-                merger.write(f_out)
+            gravado = False
+            if getattr(config, "OTIMIZAR_PDF_UNIFICADO", True) and otimizador_pdf.DISPONIVEL:
+                # Deduplica objetos idênticos (fontes, logos), comprime streams e descarta recursos não usados
+                try:
+                    tamanho_origens = sum(os.path.getsize(pdf_path) for pdf_path in pdfs_para_unir)
+                    resultado = otimizador_pdf.gravar_pdf_otimizado(merger, caminho_pdf_final, tamanho_origens)
+                    print(
+                        f"      -> PDF otimizado: {resultado.tamanho_antes / 1024:.1f} KB nas origens -> {resultado.tamanho_depois / 1024:.1f} KB "
+                        f"({resultado.reducao_percentual:.1f}% menor; {resultado.recursos_podados} recurso(s) não usado(s) podado(s), "
+                        f"{resultado.streams_comprimidos} stream(s) comprimido(s), "
+                        f"{resultado.objetos_duplicados} objeto(s) duplicado(s), {resultado.objetos_orfaos} órfão(s) removido(s)).")
+                    gravado = True
+                except Exception as e_otimizacao:
+                    # A otimização pode ter deixado o writer pela metade: remonta-o e grava sem otimizar
+                    print(f"  [PDF Unifier] Falha ao otimizar o PDF unificado ({e_otimizacao}). Gravando sem otimização.")
+                    merger = _unir_paginas(pdfs_para_unir, detalhar=False)
+            if not gravado:
+                with open(caminho_pdf_final, "wb") as f_out:
+                    merger.write(f_out)
             print(
                 f"  [PDF Unifier] PDF unificado criado com sucesso: {nome_pdf_final} em {os.path.dirname(caminho_pdf_final)}")
 
@@ -347,6 +387,54 @@ Optional[str]:
         return None
 
 
+def dividir_pdf_em_partes(caminho_pdf: str, tamanho_maximo_bytes: int, pasta_saida: str) -> Optional[List[str]]:
+    """
+    Divide um PDF em partes por intervalos de páginas, cada uma com no máximo tamanho_maximo_bytes.
+    Intervalos grandes demais são subdivididos até caberem no limite.
+    Retorna os caminhos das partes, em ordem, ou None se não for possível (ex.: uma única página maior que o limite).
+    """
+    if not PyPDF2:
+        print("  [PDF Splitter] PyPDF2 não está disponível. Não é possível dividir o PDF.")
+        return None
+    try:
+        reader = PyPDF2.PdfReader(caminho_pdf)
+        pendentes = [(0, len(reader.pages))]
+        partes = []  # (primeira página, última página + 1, bytes)
+        while pendentes:
+            inicio, fim = pendentes.pop(0)
+            writer = PyPDF2.PdfWriter()
+            for indice_pagina in range(inicio, fim):
+                writer.add_page(reader.pages[indice_pagina])
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            tamanho = buffer.tell()
+            if tamanho <= tamanho_maximo_bytes:
+                partes.append((inicio, fim, buffer.getvalue()))
+                continue
+            if fim - inicio == 1:
+                print(
+                    f"  [PDF Splitter] A página {inicio + 1} de '{os.path.basename(caminho_pdf)}' sozinha tem {tamanho} bytes, acima do limite de {tamanho_maximo_bytes}.")
+                return None
+            # Subdivide em pedaços de tamanho proporcional ao excesso, mantendo a ordem das páginas
+            n_pedacos = min(fim - inicio, -(-tamanho // tamanho_maximo_bytes))
+            limites = [inicio + (fim - inicio) * k // n_pedacos for k in range(n_pedacos + 1)]
+            pendentes[0:0] = [(limites[k], limites[k + 1]) for k in range(n_pedacos) if limites[k] < limites[k + 1]]
+
+        os.makedirs(pasta_saida, exist_ok=True)
+        nome_base, _ = os.path.splitext(os.path.basename(caminho_pdf))
+        caminhos_partes = []
+        for numero, (inicio, fim, conteudo) in enumerate(partes, start=1):
+            caminho_parte = os.path.join(pasta_saida, f"{nome_base}_parte{numero}de{len(partes)}_pag{inicio + 1}-{fim}.pdf")
+            with open(caminho_parte, "wb") as f_out:
+                f_out.write(conteudo)
+            caminhos_partes.append(caminho_parte)
+        print(f"  [PDF Splitter] '{os.path.basename(caminho_pdf)}' dividido em {len(partes)} parte(s).")
+        return caminhos_partes
+    except Exception as e:
+        print(f"  [PDF Splitter] Erro ao dividir o PDF '{os.path.basename(caminho_pdf)}': {e}")
+        return None
+
+
 # Bloco de teste para executar este script isoladamente
 if __name__ == "__main__":
     # Teste para extrair_informacoes_processo
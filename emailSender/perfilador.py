@@ -0,0 +1,122 @@
+# perfilador.py
+import os
+import io
+import time
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from typing import List, Optional
+
+
+class PerfiladorPDF:
+    """
+    Modo de perfilamento do processamento: envolve cada PDF em cProfile (e, opcionalmente,
+    tracemalloc) e grava um .prof e um resumo .txt com as top-N funções por PDF, além de
+    um perfil mesclado de toda a execução.
+
+    A amostragem (um a cada N PDFs) permite deixar o modo ligado em produção com baixo custo.
+    """
+
+    def __init__(self, pasta_saida: str, amostragem: int = 1, top_n: int = 30, memoria: bool = False):
+        self.amostragem = max(1, int(amostragem))
+        self.top_n = max(1, int(top_n))
+        self.memoria = memoria
+        self.pasta_execucao = os.path.join(pasta_saida, time.strftime("%Y%m%d_%H%M%S"))
+        self._contador = 0
+        self._arquivos_prof: List[str] = []
+
+    def deve_perfilar(self) -> bool:
+        """Avança o contador de PDFs e diz se o PDF atual entra na amostra."""
+        self._contador += 1
+        return (self._contador - 1) % self.amostragem == 0
+
+    @contextmanager
+    def perfilar(self, nome_pdf: str, amostrado: Optional[bool] = None):
+        """
+        Context manager que perfila o bloco se o PDF estiver na amostra.
+        'amostrado' é o resultado de deve_perfilar() já consultado pelo chamador (None: consulta aqui).
+        """
+        if amostrado is None:
+            amostrado = self.deve_perfilar()
+        if not amostrado:
+            yield
+            return
+
+        os.makedirs(self.pasta_execucao, exist_ok=True)
+        base, _ = os.path.splitext(nome_pdf)
+        caminho_prof = os.path.join(self.pasta_execucao, f"{base}.prof")
+        caminho_txt = os.path.join(self.pasta_execucao, f"{base}.txt")
+
+        iniciou_tracemalloc = False
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            iniciou_tracemalloc = True
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            duracao = time.perf_counter() - inicio
+            snapshot = None
+            pico_memoria = None
+            if self.memoria and tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                _, pico_memoria = tracemalloc.get_traced_memory()
+                if iniciou_tracemalloc:
+                    tracemalloc.stop()
+            try:
+                perfil.dump_stats(caminho_prof)
+                self._arquivos_prof.append(caminho_prof)
+                with open(caminho_txt, "w", encoding="utf-8") as f:
+                    f.write(f"PDF: {nome_pdf}\n")
+                    f.write(f"Tempo total: {duracao:.3f}s\n")
+                    if pico_memoria is not None:
+                        f.write(f"Pico de memória (tracemalloc): {pico_memoria / 1024 / 1024:.2f} MB\n")
+                    f.write("\n")
+                    f.write(self._resumo_stats(pstats.Stats(caminho_prof)))
+                    if snapshot is not None:
+                        f.write(self._resumo_memoria(snapshot))
+                print(f"  [Perfilador] Perfil de '{nome_pdf}' gravado em {caminho_prof} ({duracao:.2f}s).")
+            except Exception as e:
+                print(f"  [Perfilador] Erro ao gravar o perfil de '{nome_pdf}': {e}")
+
+    def finalizar(self) -> Optional[str]:
+        """Mescla os perfis da execução em um único .prof + resumo. Retorna o caminho do .prof mesclado."""
+        if not self._arquivos_prof:
+            print("  [Perfilador] Nenhum PDF foi perfilado nesta execução.")
+            return None
+        caminho_mesclado = os.path.join(self.pasta_execucao, "execucao_completa.prof")
+        try:
+            stats = pstats.Stats(self._arquivos_prof[0])
+            for caminho in self._arquivos_prof[1:]:
+                stats.add(caminho)
+            stats.dump_stats(caminho_mesclado)
+            with open(os.path.join(self.pasta_execucao, "execucao_completa.txt"), "w", encoding="utf-8") as f:
+                f.write(f"PDFs perfilados: {len(self._arquivos_prof)} de {self._contador} "
+                        f"(amostragem: 1 a cada {self.amostragem})\n\n")
+                f.write(self._resumo_stats(stats))
+            print(
+                f"  [Perfilador] Perfil mesclado de {len(self._arquivos_prof)} PDF(s) gravado em {caminho_mesclado}")
+            return caminho_mesclado
+        except Exception as e:
+            print(f"  [Perfilador] Erro ao mesclar os perfis da execução: {e}")
+            return None
+
+    def _resumo_stats(self, stats: pstats.Stats) -> str:
+        saida = io.StringIO()
+        stats.stream = saida
+        saida.write(f"--- Top {self.top_n} por tempo acumulado ---\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        saida.write(f"--- Top {self.top_n} por tempo próprio ---\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        return saida.getvalue()
+
+    def _resumo_memoria(self, snapshot: "tracemalloc.Snapshot") -> str:
+        linhas = [f"\n--- Top {self.top_n} alocações de memória por linha (tracemalloc) ---\n"]
+        for estatistica in snapshot.statistics("lineno")[:self.top_n]:
+            linhas.append(f"{estatistica}\n")
+        return "".join(linhas)
@@ -0,0 +1,148 @@
+# smtp_pipelining.py
+import re
+import smtplib
+from email.utils import parseaddr
+from typing import List, NamedTuple
+
+CRLF = b"\r\n"
+PADRAO_FIM_DE_LINHA = re.compile(rb"\r\n|\n|\r")
+PADRAO_PONTO_INICIAL = re.compile(rb"(?m)^\.")
+
+
+class ResultadoEnvio(NamedTuple):
+    """Resultado de uma mensagem enviada por enviar_lote."""
+    sucesso: bool
+    detalhe: str
+    recusados: dict
+
+
+def _normalizar_crlf(dados: bytes) -> bytes:
+    dados = PADRAO_FIM_DE_LINHA.sub(CRLF, dados)
+    if not dados.endswith(CRLF):
+        dados += CRLF
+    return dados
+
+
+def _comando(verbo: str, argumento: str = "") -> bytes:
+    return f"{verbo} {argumento}".rstrip().encode("ascii") + CRLF
+
+
+class SMTPPipelining(smtplib.SMTP):
+    """
+    smtplib.SMTP que aproveita as extensões ESMTP PIPELINING (RFC 2920) e CHUNKING/BDAT (RFC 3030).
+
+    - Com CHUNKING: MAIL, RCPT e "BDAT n LAST" + conteúdo de todas as mensagens vão em uma única
+      escrita; as respostas são lidas depois, na ordem. Um lote inteiro custa ~1 ida e volta.
+    - Só com PIPELINING: MAIL/RCPT/DATA seguem juntos e, após o 354, o conteúdo e o "." da mensagem
+      seguem junto com os comandos da próxima mensagem. ~1 ida e volta por mensagem.
+    - Sem PIPELINING: cai no sendmail tradicional (passo a passo).
+
+    Entre mensagens é enviado um RSET (também em pipeline), para que a falha de uma
+    transação não contamine a seguinte.
+    """
+
+    def enviar_lote(self, remetente: str, destinatarios: List[str], mensagens: List[bytes]) -> List[ResultadoEnvio]:
+        """Envia várias mensagens (já serializadas) na mesma sessão. Retorna um resultado por mensagem."""
+        self.ehlo_or_helo_if_needed()
+        if not self.has_extn("pipelining"):
+            return self._enviar_lote_passo_a_passo(remetente, destinatarios, mensagens)
+        if self.has_extn("chunking"):
+            return self._enviar_lote_bdat(remetente, destinatarios, mensagens)
+        return self._enviar_lote_data(remetente, destinatarios, mensagens)
+
+    def _comandos_envelope(self, remetente: str, destinatarios: List[str], tamanho: int) -> bytes:
+        opcoes = f" SIZE={tamanho}" if self.has_extn("size") else ""
+        comandos = _comando("MAIL", f"FROM:<{parseaddr(remetente)[1]}>{opcoes}")
+        for destinatario in destinatarios:
+            comandos += _comando("RCPT", f"TO:<{parseaddr(destinatario)[1]}>")
+        return comandos
+
+    def _ler_respostas_envelope(self, destinatarios: List[str]):
+        """Lê as respostas de MAIL e de cada RCPT. Retorna (erro do MAIL ou None, recusados, aceitos)."""
+        codigo, resposta = self.getreply()
+        erro_mail = None if codigo == 250 else f"MAIL recusado: {codigo} {resposta!r}"
+        recusados = {}
+        for destinatario in destinatarios:
+            codigo_rcpt, resposta_rcpt = self.getreply()
+            if codigo_rcpt not in (250, 251):
+                recusados[destinatario] = (codigo_rcpt, resposta_rcpt)
+        return erro_mail, recusados, len(destinatarios) - len(recusados)
+
+    def _enviar_lote_bdat(self, remetente, destinatarios, mensagens) -> List[ResultadoEnvio]:
+        lote = b""
+        for i, mensagem in enumerate(mensagens):
+            dados = _normalizar_crlf(mensagem)
+            if i > 0:
+                lote += _comando("RSET")
+            lote += self._comandos_envelope(remetente, destinatarios, len(dados))
+            # O servidor lê os n bytes do BDAT mesmo se recusar a transação, então é seguro enviar tudo de uma vez
+            lote += _comando("BDAT", f"{len(dados)} LAST") + dados
+        self.send(lote)
+
+        resultados = []
+        for i in range(len(mensagens)):
+            if i > 0:
+                self.getreply()  # RSET
+            erro_mail, recusados, aceitos = self._ler_respostas_envelope(destinatarios)
+            codigo, resposta = self.getreply()  # BDAT LAST
+            if erro_mail:
+                resultados.append(ResultadoEnvio(False, erro_mail, recusados))
+            elif not aceitos:
+                resultados.append(ResultadoEnvio(False, "Todos os destinatários foram recusados.", recusados))
+            elif codigo != 250:
+                resultados.append(ResultadoEnvio(False, f"BDAT recusado: {codigo} {resposta!r}", recusados))
+            else:
+                resultados.append(ResultadoEnvio(True, resposta.decode("utf-8", "replace"), recusados))
+        return resultados
+
+    def _enviar_lote_data(self, remetente, destinatarios, mensagens) -> List[ResultadoEnvio]:
+        resultados = []
+        pendente = b""  # conteúdo + "." da mensagem anterior, enviado junto com os comandos da próxima
+        for i, mensagem in enumerate(mensagens):
+            dados = PADRAO_PONTO_INICIAL.sub(b"..", _normalizar_crlf(mensagem)) + b"." + CRLF
+            grupo = pendente
+            if i > 0:
+                grupo += _comando("RSET")
+            grupo += self._comandos_envelope(remetente, destinatarios, len(dados)) + _comando("DATA")
+            self.send(grupo)
+
+            if pendente:
+                resultados[-1] = self._resultado_fim_dos_dados(resultados[-1])
+            if i > 0:
+                self.getreply()  # RSET
+            erro_mail, recusados, aceitos = self._ler_respostas_envelope(destinatarios)
+            codigo, resposta = self.getreply()  # DATA
+            pendente = b""
+            if codigo == 354 and not erro_mail and aceitos:
+                pendente = dados
+                resultados.append(ResultadoEnvio(True, "", recusados))  # confirmado pelo 250 após o "."
+            else:
+                if codigo == 354:
+                    # Não deveria acontecer sem destinatários aceitos; encerra a transação vazia
+                    self.send(b"." + CRLF)
+                    self.getreply()
+                resultados.append(ResultadoEnvio(
+                    False, erro_mail or ("Todos os destinatários foram recusados." if not aceitos
+                                         else f"DATA recusado: {codigo} {resposta!r}"), recusados))
+        if pendente:
+            self.send(pendente)
+            resultados[-1] = self._resultado_fim_dos_dados(resultados[-1])
+        return resultados
+
+    def _resultado_fim_dos_dados(self, parcial: ResultadoEnvio) -> ResultadoEnvio:
+        codigo, resposta = self.getreply()
+        if codigo != 250:
+            return ResultadoEnvio(False, f"Mensagem recusada após os dados: {codigo} {resposta!r}", parcial.recusados)
+        return ResultadoEnvio(True, resposta.decode("utf-8", "replace"), parcial.recusados)
+
+    def _enviar_lote_passo_a_passo(self, remetente, destinatarios, mensagens) -> List[ResultadoEnvio]:
+        resultados = []
+        for mensagem in mensagens:
+            try:
+                recusados = self.sendmail(remetente, destinatarios, mensagem)
+                resultados.append(ResultadoEnvio(True, "", recusados))
+            except smtplib.SMTPRecipientsRefused as e:
+                resultados.append(ResultadoEnvio(False, "Todos os destinatários foram recusados.", e.recipients))
+            except smtplib.SMTPResponseException as e:
+                resultados.append(ResultadoEnvio(False, f"{e.smtp_code} {e.smtp_error!r}", {}))
+        return resultados
@@ -0,0 +1,110 @@
+# worker_extracao.py
+# Código que roda nos processos do pool da extração paralela (extracao_paralela). Fica num módulo leve,
+# que só importa extrator_campos e pdfplumber: os processos do pool carregam este módulo como __main__
+# em vez do main.py, sem pagar as importações de pandas, PyPDF2 etc. a cada processo.
+import sys
+import multiprocessing.context
+from typing import Dict, Optional, Tuple
+
+import extrator_campos
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None  # extracao_paralela já avisa e não cria o pool
+
+# PDF aberto pelo processo, reaproveitado entre os blocos do mesmo arquivo
+_pdf_do_worker = None
+# Valor compartilhado com o processo que criou o pool: a última geração (um PDF) já cancelada
+_geracao_cancelada = None
+
+
+class _ProcessoLeve(multiprocessing.context.SpawnProcess):
+    """
+    Processo "spawn" cujo filho carrega este módulo como __main__. O spawn normal reimporta o
+    __main__ do pai (o main.py) em cada processo; a própria classe fica aqui porque o objeto
+    do processo é desserializado no filho.
+    """
+
+    @staticmethod
+    def _Popen(process_obj):
+        main_original = sys.modules["__main__"]
+        sys.modules["__main__"] = sys.modules[__name__]
+        try:
+            return multiprocessing.context.SpawnProcess._Popen(process_obj)
+        finally:
+            sys.modules["__main__"] = main_original
+
+
+class ContextoLeve(multiprocessing.context.SpawnContext):
+    """Contexto "spawn" do pool da extração paralela (ver _ProcessoLeve)."""
+    Process = _ProcessoLeve
+
+
+def inicializar(geracao_cancelada):
+    """Inicializador dos processos do pool: recebe o valor compartilhado de cancelamento."""
+    global _geracao_cancelada
+    _geracao_cancelada = geracao_cancelada
+
+
+def _cancelado(geracao: Optional[int]) -> bool:
+    return geracao is not None and _geracao_cancelada is not None and _geracao_cancelada.value >= geracao
+
+
+def abrir_pdf(caminho_pdf: str):
+    global _pdf_do_worker
+    if _pdf_do_worker is None or _pdf_do_worker[0] != caminho_pdf:
+        fechar_pdf()
+        _pdf_do_worker = (caminho_pdf, pdfplumber.open(caminho_pdf))
+    return _pdf_do_worker[1]
+
+
+def fechar_pdf():
+    global _pdf_do_worker
+    if _pdf_do_worker is not None:
+        _pdf_do_worker[1].close()
+        _pdf_do_worker = None
+
+
+def _texto_pagina(pdf, indice_pagina: int) -> str:
+    # Mesma extração e mesma junção ("\n" após cada página com texto) de pdf_processor.extrair_texto_do_pdf
+    pagina = pdf.pages[indice_pagina]
+    texto = pagina.extract_text(x_tolerance=2, y_tolerance=2)
+    if hasattr(pagina, "close"):
+        pagina.close()  # libera o cache de layout da página
+    return texto + "\n" if texto else ""
+
+
+def escanear_bloco(bloco: Tuple[str, int, int, Optional[int]]) -> Tuple[int, Optional[Dict[str, Tuple[str, int]]]]:
+    """
+    Procura Vara/Comarca nas páginas [inicio, fim) de um PDF. Retorna (inicio, {campo: (valor, página 1-based)}),
+    ou (inicio, None) se a geração do bloco foi cancelada antes de ele terminar (geração None: nunca cancela).
+
+    O texto da página seguinte ao bloco é incluído como sobreposição, para que uma ocorrência
+    quebrada na divisa entre blocos seja encontrada inteira; ocorrências que *começam* na
+    sobreposição são descartadas (pertencem ao próximo bloco).
+    """
+    caminho_pdf, inicio, fim, geracao = bloco
+    textos = []
+    for indice_pagina in range(inicio, fim):
+        if _cancelado(geracao):
+            fechar_pdf()  # o PDF já foi decidido: não segura o arquivo até o próximo
+            return inicio, None
+        textos.append(_texto_pagina(abrir_pdf(caminho_pdf), indice_pagina))
+    pdf = abrir_pdf(caminho_pdf)
+    sobreposicao = _texto_pagina(pdf, fim) if fim < len(pdf.pages) else ""
+    campos = extrator_campos.extrair_campos("".join(textos) + sobreposicao)
+
+    # Deslocamento final de cada página do bloco, para converter posição no texto em página
+    fins_paginas, acumulado = [], 0
+    for texto in textos:
+        acumulado += len(texto)
+        fins_paginas.append(acumulado)
+
+    achados = {}
+    for campo in extrator_campos.CAMPOS:
+        valor, posicao = getattr(campos, campo), getattr(campos, "posicao_" + campo)
+        if valor and posicao[0] < acumulado:
+            pagina = next(i for i, fim_pagina in enumerate(fins_paginas) if posicao[0] < fim_pagina)
+            achados[campo] = (valor, inicio + pagina + 1)
+    return inicio, achados